@@ -10,7 +10,10 @@ sudo podman exec iso-builder su - builder -c "
   cd test-builder/src/source && \
   git clone https://github.com/altlinux/mkimage-profiles mkimage-profiles && \
   cp -rf mkimage/* mkimage-profiles && \
-  cd mkimage-profiles
+  cd mkimage-profiles && \
+  if [ -n \"${OS_INSTALLER_OFFLINE_IMAGE}\" ]; then \
+    features.in/os-installer/embed-image.sh \"${OS_INSTALLER_OFFLINE_IMAGE}\"; \
+  fi && \
   make \
   IMAGEDIR=\"/workspace/out\" \
   BUILDLOG=\"/workspace/out/build.log\" \
@@ -0,0 +1,30 @@
+#!/bin/bash
+
+# Embeds the system image into the live system of use/os-installer, so
+# installing needs no network. Run in the mkimage-profiles tree before make:
+#   features.in/os-installer/embed-image.sh [image]
+# The image is stored as read-only containers-storage inside a squashfs,
+# install.sh mounts it as additional image store and installs from it.
+
+set -e
+
+IMAGE=${1:-ghcr.io/alt-gnome/alt-atomic:latest}
+FEATURE_DIR=$(dirname "$(readlink -f "$0")")
+OUTPUT="$FEATURE_DIR/live/files/usr/share/os-installer/image-store.squashfs"
+CONFIG="$FEATURE_DIR/live/files/etc/os-installer/config.yaml"
+
+WORK_DIR=$(mktemp -d)
+trap 'sudo rm -rf "$WORK_DIR"' EXIT
+
+echo "Embedding $IMAGE"
+sudo skopeo copy "docker://$IMAGE" \
+    "containers-storage:[overlay@$WORK_DIR/store+$WORK_DIR/run]$IMAGE"
+
+# layer files keep their owners and capabilities
+sudo mksquashfs "$WORK_DIR/store" "$OUTPUT" -noappend -comp zstd -xattrs
+sudo chmod 644 "$OUTPUT"
+echo "Embedded image store: $(du -h "$OUTPUT" | cut -f1)"
+
+# the embedded image gets installed, without asking for a network
+sed -i -e "s|^container_image:.*|container_image: '$IMAGE'|" \
+    -e "s|^internet_connection_required:.*|internet_connection_required: no|" "$CONFIG"
@@ -1,14 +1,30 @@
 #!/usr/bin/env bash
 
-if [[ $OSI_USE_ENCRYPTION -eq 0 ]];then
-    ROOT_PART=$(sudo blkid -o device -t PARTLABEL=alt-root) || quit_on_err "Root раздел не найден"
+source "$(dirname "$0")/progress.sh"
+
+quit_on_err() { echo "ERROR: $1" >&2; exit 1; }
+
+# devices come from install.sh, only discovered when run on their own
+if [[ -n "$OSI_OUT_ROOT_PART" ]]; then
+    ROOT_PART="$OSI_OUT_ROOT_PART"
+    EFI_PART="$OSI_OUT_EFI_PART"
+    BOOT_PART="$OSI_OUT_BOOT_PART"
 else
-    ROOT_PART="/dev/mapper/alt-root"
+    if [[ $OSI_USE_ENCRYPTION -eq 0 ]];then
+        ROOT_PART=$(sudo blkid -o device -t PARTLABEL=alt-root) || quit_on_err "Root раздел не найден"
+    else
+        ROOT_PART="/dev/mapper/alt-root"
+    fi
+    EFI_PART=$(sudo blkid -o device -t PARTLABEL=alt-efi) || quit_on_err "EFI раздел не найден"
+    BOOT_PART=$(sudo blkid -o device -t PARTLABEL=alt-boot) || quit_on_err "Boot раздел не найден"
 fi
-EFI_PART=$(sudo blkid -o device -t PARTLABEL=alt-efi) || quit_on_err "EFI раздел не найден"
-BOOT_PART=$(sudo blkid -o device -t PARTLABEL=alt-boot) || quit_on_err "Boot раздел не найден"
 
 find_ostree_deploy() {
+    if [[ -n "$OSI_OUT_OSTREE_DEPLOY" && -d "/mnt/target/$OSI_OUT_OSTREE_DEPLOY" ]]; then
+        OSTREE_DEPLOY="/mnt/target/$OSI_OUT_OSTREE_DEPLOY"
+        return
+    fi
+
     DEPLOY_DIR="/mnt/target/ostree/deploy/default/deploy"
     [[ ! -d "$DEPLOY_DIR" ]] && quit_on_err "Директория $DEPLOY_DIR не найдена"
     for entry in "$DEPLOY_DIR"/*; do
@@ -21,9 +37,12 @@ find_ostree_deploy() {
 }
 
 configure_system() {
-    UUID_ROOT=$(sudo blkid -s UUID -o value "$ROOT_PART") || quit_on_err "Не удалось получить UUID root"
-    UUID_BOOT=$(sudo blkid -s UUID -o value "$BOOT_PART") || quit_on_err "Не удалось получить UUID boot"
-    UUID_EFI=$(sudo blkid -s UUID -o value "$EFI_PART") || quit_on_err "Не удалось получить UUID EFI"
+    UUID_ROOT=${OSI_OUT_ROOT_UUID:-$(sudo blkid -s UUID -o value "$ROOT_PART")}
+    [[ -n "$UUID_ROOT" ]] || quit_on_err "Не удалось получить UUID root"
+    UUID_BOOT=${OSI_OUT_BOOT_UUID:-$(sudo blkid -s UUID -o value "$BOOT_PART")}
+    [[ -n "$UUID_BOOT" ]] || quit_on_err "Не удалось получить UUID boot"
+    UUID_EFI=${OSI_OUT_EFI_UUID:-$(sudo blkid -s UUID -o value "$EFI_PART")}
+    [[ -n "$UUID_EFI" ]] || quit_on_err "Не удалось получить UUID EFI"
 
     read -r firstname _ <<< "$OSI_USER_NAME"
 
@@ -75,6 +94,7 @@ umount_all() {
     fi
 }
 
+osi_phase configure
 configure_system
 umount_all
 sudo sync
@@ -0,0 +1,78 @@
+#!/usr/bin/env bash
+
+# Sourced by the install scripts: where the system image gets staged while
+# choices are still being made. Lives on the live system's overlay.
+
+source "$(dirname "${BASH_SOURCE[0]}")/progress.sh"
+
+IMAGE="${OSI_CONTAINER_IMAGE:-ghcr.io/alt-gnome/alt-atomic:latest}"
+STAGING_STORE="${STAGING_STORE:-/var/lib/os-installer/image-store}"
+STAGING_RUNROOT="${STAGING_RUNROOT:-/run/os-installer/image-runroot}"
+# contains the image name once enough space was found to stage it
+STAGING_IMAGE_FILE="$STAGING_STORE/.image"
+# contains the image name once it was fully pulled
+STAGING_COMPLETE_FILE="$STAGING_STORE/.complete"
+# read-only store embedded into the live system at build time, see
+# embed-image.sh of the mkimage feature; used in place, without network
+EMBEDDED_STORE_IMAGE="${EMBEDDED_STORE_IMAGE:-/usr/share/os-installer/image-store.squashfs}"
+EMBEDDED_STORE="/run/os-installer/embedded-store"
+EMBEDDED_STORAGE_CONF="/run/os-installer/embedded-storage.conf"
+
+staging_podman() {
+    sudo podman --root "$STAGING_STORE" --runroot "$STAGING_RUNROOT" "$@"
+}
+
+# registries on localhost, like the test stand-in, are served without tls
+tls_options() {
+    [[ "$IMAGE" == localhost[:/]* ]] && echo "--tls-verify=false"
+}
+
+image_is_staged() {
+    [[ "$(sudo cat "$STAGING_IMAGE_FILE" 2>/dev/null)" == "$IMAGE" ]]
+}
+
+image_is_complete() {
+    [[ "$(sudo cat "$STAGING_COMPLETE_FILE" 2>/dev/null)" == "$IMAGE" ]]
+}
+
+# podman with the embedded store as additional image store
+embedded_podman() {
+    sudo CONTAINERS_STORAGE_CONF="$EMBEDDED_STORAGE_CONF" podman "$@"
+}
+
+# mounts the embedded store if the live system has one, succeeds if it
+# contains the image
+image_is_embedded() {
+    [[ -f "$EMBEDDED_STORE_IMAGE" ]] || return 1
+    if ! mountpoint -q "$EMBEDDED_STORE"; then
+        sudo mount --mkdir -t squashfs -o ro,loop "$EMBEDDED_STORE_IMAGE" "$EMBEDDED_STORE" || return 1
+    fi
+    sudo tee "$EMBEDDED_STORAGE_CONF" > /dev/null <<EOF
+[storage]
+driver = "overlay"
+graphroot = "/var/lib/containers/storage"
+runroot = "/run/containers/storage"
+
+[storage.options]
+additionalimagestores = ["$EMBEDDED_STORE"]
+EOF
+    embedded_podman image exists "$IMAGE"
+}
+
+count_layers() {
+    skopeo inspect $(tls_options) --format '{{len .Layers}}' "docker://$IMAGE" 2>/dev/null
+}
+
+# passes podman pull output through, counting pulled layers as progress
+report_pull_progress() {
+    local layers="$1" done=0
+    while read -r line; do
+        echo "$line"
+        if [[ "$line" == "Copying blob"* && ( "$line" == *done* || "$line" == *skipped* ) ]]; then
+            done=$((done + 1))
+            echo "Загрузка образа: слоёв $done из ${layers:-?}"
+            [[ -n "$layers" ]] && osi_progress "$done" "$layers"
+        fi
+    done
+    return 0
+}
@@ -0,0 +1,19 @@
+#!/usr/bin/env bash
+
+# Runs early, while choices are still being made: only reads from the system.
+
+quit_on_err() { echo "ERROR: $1" >&2; exit 1; }
+
+check_commands() {
+    local cmds=(lsblk sfdisk udevadm blkid cryptsetup mkfs.vfat mkfs.ext4 mkfs.btrfs btrfs podman skopeo rsync)
+    # looked up in one go, as root sees them
+    local missing
+    missing=$(sudo sh -c 'for cmd; do command -v "$cmd" > /dev/null || echo "$cmd"; done' sh "${cmds[@]}") \
+        || quit_on_err "Не удалось проверить наличие команд"
+    for cmd in $missing; do
+        quit_on_err "Команда '$cmd' не найдена. Установите её и повторите попытку."
+    done
+}
+
+check_commands
+exit 0
@@ -0,0 +1,49 @@
+#!/usr/bin/env bash
+
+# Runs early, while choices are still being made: pulls the system image into
+# the staging store, which install.sh then uses. Only speculative, so it never
+# fails the installation. install.sh pulls whatever is still missing.
+
+source "$(dirname "$0")/image-store.sh"
+
+# staging happens in memory on the live system, leave room for the rest
+MIN_FREE_KIB=${STAGING_MIN_FREE_KIB:-$((8 * 1024 * 1024))}
+
+[[ "$OSI_IMAGE_PREFETCH" -eq 1 ]] || { echo "Предварительная загрузка образа отключена"; exit 0; }
+image_is_embedded && { echo "Образ $IMAGE есть на установочном носителе"; exit 0; }
+image_is_complete && { echo "Образ $IMAGE уже загружен"; exit 0; }
+
+sudo mkdir -p "$STAGING_STORE" "$STAGING_RUNROOT" || exit 0
+if ! image_is_staged; then
+    FREE_KIB=$(df --output=avail -k "$STAGING_STORE" | tail -n 1)
+    if (( FREE_KIB < MIN_FREE_KIB )); then
+        echo "Недостаточно памяти для предварительной загрузки образа, он будет загружен при установке"
+        exit 0
+    fi
+    echo "$IMAGE" | sudo tee "$STAGING_IMAGE_FILE" > /dev/null
+fi
+
+LAYERS=$(count_layers)
+echo "Предварительная загрузка образа $IMAGE"
+# shown once the installation waits for the prefetch
+osi_phase pull
+
+pull_with_progress() {
+    set -o pipefail
+    staging_podman pull $(tls_options) "$IMAGE" 2>&1 | report_pull_progress "$LAYERS"
+}
+
+# own process group, so quitting the installer stops the whole pull
+# pulled layers are kept for later
+set -m
+pull_with_progress &
+PULL_PID=$!
+trap 'kill -TERM -- -$PULL_PID 2>/dev/null; wait $PULL_PID; exit 0' TERM INT
+
+if wait $PULL_PID; then
+    echo "$IMAGE" | sudo tee "$STAGING_COMPLETE_FILE" > /dev/null
+    echo "Образ $IMAGE загружен"
+else
+    echo "Не удалось загрузить образ заранее, загрузка продолжится при установке"
+fi
+exit 0
@@ -6,179 +6,182 @@ TYPE_BOOT=${TYPE_BOOT:-$( [ $? -eq 0 ] && echo "UEFI" || echo "LEGACY" )}
 
 quit_on_err() { echo "ERROR: $1" >&2; exit 1; }
 
-check_commands() {
-    local cmds=(wipefs parted lsblk sfdisk blkid cryptsetup blockdev mkfs.vfat mkfs.ext4 mkfs.btrfs btrfs podman rsync)
-    for cmd in "${cmds[@]}"; do
-        sudo which "$cmd" >/dev/null 2>&1 || quit_on_err "Команда '$cmd' не найдена. Установите её и повторите попытку."
-    done
-}
+source "$(dirname "$0")/image-store.sh"
+source "$(dirname "$0")/jobs.sh"
+source "$(dirname "$0")/partition-plan.sh"
+source "$(dirname "$0")/step-output.sh"
+
+# unpacked image, only needed during installation
+CONTAINERS_SUBVOLUME="@install-containers"
+# available memory needed to unpack the image there instead of on disk
+RAM_STORAGE_MIN_KIB=${RAM_STORAGE_MIN_KIB:-$((24 * 1024 * 1024))}
+# left for the live system when unpacking into memory
+RAM_STORAGE_RESERVE_KIB=$((4 * 1024 * 1024))
 
 prepare_disk() {
+    local disk="$OSI_DEVICE_PATH"
     if [[ $OSI_DEVICE_IS_PARTITION -eq 0 ]]; then
         echo "Подготовка полного диска: $OSI_DEVICE_PATH"
-        sudo wipefs --all "$OSI_DEVICE_PATH" || quit_on_err "Ошибка вайпа диска"
-        sudo parted -s "$OSI_DEVICE_PATH" mklabel gpt || quit_on_err "Ошибка создания GPT метки"
-
-        if [[ "$TYPE_BOOT" == "LEGACY" ]]; then
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart primary ext4 1MiB 3MiB || quit_on_err "Ошибка создания BIOS Boot раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" set 1 bios_grub on || quit_on_err "Ошибка установки флага bios_grub"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-efi fat32 3MiB 1003MiB || quit_on_err "Ошибка создания EFI раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" set 2 boot on || quit_on_err "Ошибка установки boot флага для EFI"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-boot ext4 1003MiB 3003MiB || quit_on_err "Ошибка создания Boot раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-root "$ROOT_FS" 3003MiB 25003MiB || quit_on_err "Ошибка создания Root раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-temp ext4 25003MiB 60003MiB || quit_on_err "Ошибка создания Temp раздела"
-        else
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-efi fat32 1MiB 601MiB || quit_on_err "Ошибка создания EFI раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" set 1 boot on || quit_on_err "Ошибка установки boot флага для EFI"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-boot ext4 601MiB 2601MiB || quit_on_err "Ошибка создания Boot раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-root "$ROOT_FS" 2601MiB 25001MiB || quit_on_err "Ошибка создания Root раздела"
-            sudo parted -s "$OSI_DEVICE_PATH" mkpart alt-temp ext4 25001MiB 60001MiB || quit_on_err "Ошибка создания Temp раздела"
-        fi
+        plan_disk "$OSI_DEVICE_PATH" "$TYPE_BOOT" || quit_on_err "Недостаточно места"
+        apply_plan "$disk" --wipe always --wipe-partitions always || quit_on_err "Ошибка разметки диска"
     else
-        DISK="/dev/$(sudo lsblk -no pkname "$OSI_DEVICE_PATH" 2>/dev/null)"
-        PART_NUM=$(echo "$OSI_DEVICE_PATH" | grep -o '[0-9]\+$')
-        [[ -z "$PART_NUM" ]] && quit_on_err "Не удалось извлечь номер раздела"
-        PART_INFO=$(sudo sfdisk -d "$DISK" | grep "^$OSI_DEVICE_PATH") || quit_on_err "Информация о разделе не найдена"
-        START=$(echo "$PART_INFO" | awk -F'start=' '{print $2}' | awk -F',' '{print $1}' | tr -d ' ')
-        SIZE=$(echo "$PART_INFO" | awk -F'size=' '{print $2}' | awk -F',' '{print $1}' | tr -d ' ')
-        [[ -z "$START" || -z "$SIZE" ]] && quit_on_err "Ошибка получения данных о разделе"
-
-        EFI_SIZE=$((600 * 1024 * 1024))
-        BOOT_SIZE=$((2 * 1024 * 1024 * 1024))
-        ROOT_SIZE=$((19 * 1024 * 1024 * 1024))
-        TEMP_SIZE=$((35 * 1024 * 1024 * 1024))
-        if [[ "$TYPE_BOOT" == "LEGACY" ]]; then
-            BIOS_SIZE=$((2 * 1024 * 1024))
-        else
-            BIOS_SIZE=0
-        fi
-
-        SECSIZE=$(sudo blockdev --getss "$DISK") || quit_on_err "Не удалось определить размер сектора"
-        BIOS_SEC=$(( (BIOS_SIZE + SECSIZE - 1) / SECSIZE ))
-        EFI_SEC=$(( (EFI_SIZE + SECSIZE - 1) / SECSIZE ))
-        BOOT_SEC=$(( (BOOT_SIZE + SECSIZE - 1) / SECSIZE ))
-        ROOT_SEC=$(( (ROOT_SIZE + SECSIZE - 1) / SECSIZE ))
-        TEMP_SEC=$(( (TEMP_SIZE + SECSIZE - 1) / SECSIZE ))
-        TOTAL=$(( BIOS_SEC + EFI_SEC + BOOT_SEC + ROOT_SEC + TEMP_SEC ))
-        (( TOTAL > SIZE )) && quit_on_err "Недостаточно места"
-
-        sudo sfdisk --delete "$DISK" "$PART_NUM" || quit_on_err "Не удалось удалить раздел $PART_NUM"
-        if [[ "$TYPE_BOOT" == "LEGACY" ]]; then
-            P1="$PART_NUM"; P2=$(( PART_NUM+1 )); P3=$(( PART_NUM+2 )); P4=$(( PART_NUM+3 )); P5=$(( PART_NUM+4 ))
-            S1=$START; E1=$(( S1+BIOS_SEC-1 ))
-            S2=$(( E1+1 )); E2=$(( S2+EFI_SEC-1 ))
-            S3=$(( E2+1 )); E3=$(( S3+BOOT_SEC-1 ))
-            S4=$(( E3+1 )); E4=$(( S4+ROOT_SEC-1 ))
-            S5=$(( E4+1 )); E5=$(( S5+TEMP_SEC-1 ))
-            (( E5 > START+SIZE )) && quit_on_err "Новый раздел выходит за пределы исходного"
-            sudo parted -s "$DISK" unit s mkpart alt-bios ${S1} ${E1}
-            sudo parted -s "$DISK" set "$P1" bios_grub on || quit_on_err "Ошибка установки флага bios_grub"
-            sudo parted -s "$DISK" unit s mkpart alt-efi ${S2} ${E2}
-            sudo parted -s "$DISK" set "$P2" boot on || quit_on_err "Ошибка установки флага boot"
-            sudo parted -s "$DISK" unit s mkpart alt-boot ${S3} ${E3}
-            sudo parted -s "$DISK" unit s mkpart alt-root ${S4} ${E4}
-            sudo parted -s "$DISK" unit s mkpart alt-temp ${S5} ${E5}
-        else
-            P1="$PART_NUM"; P2=$(( PART_NUM+1 )); P3=$(( PART_NUM+2 )); P4=$(( PART_NUM+3 ))
-            S1=$START; E1=$(( S1+EFI_SEC-1 ))
-            S2=$(( E1+1 )); E2=$(( S2+BOOT_SEC-1 ))
-            S3=$(( E2+1 )); E3=$(( S3+ROOT_SEC-1 ))
-            S4=$(( E3+1 )); E4=$(( S4+TEMP_SEC-1 ))
-            (( E4 > START+SIZE )) && quit_on_err "Новый раздел выходит за пределы исходного"
-            sudo parted -s "$DISK" unit s mkpart alt-efi ${S1} ${E1}
-            sudo parted -s "$DISK" set "$P1" boot on || quit_on_err "Ошибка установки флага boot"
-            sudo parted -s "$DISK" unit s mkpart alt-boot ${S2} ${E2}
-            sudo parted -s "$DISK" unit s mkpart alt-root ${S3} ${E3}
-            sudo parted -s "$DISK" unit s mkpart alt-temp ${S4} ${E4}
-        fi
-
-        sudo partprobe "$DISK" || sleep 2
+        plan_partition "$OSI_DEVICE_PATH" "$TYPE_BOOT" || quit_on_err "Недостаточно места в разделе $OSI_DEVICE_PATH"
+        disk="$PLAN_DISK"
+        apply_plan "$disk" || quit_on_err "Ошибка разметки диска $disk"
     fi
+    echo "Разметка $disk: сектор $SECTOR_SIZE байт, выравнивание $GRAIN секторов"
 
     # Export partition variables
-    export EFI_PART=$(sudo blkid -o device -t PARTLABEL=alt-efi) || quit_on_err "EFI раздел не найден"
-    export BOOT_PART=$(sudo blkid -o device -t PARTLABEL=alt-boot) || quit_on_err "Boot раздел не найден"
-    export ROOT_PART=$(sudo blkid -o device -t PARTLABEL=alt-root) || quit_on_err "Не найден Root раздел"
-    export TEMP_PART=$(sudo blkid -o device -t PARTLABEL=alt-temp) || quit_on_err "Не найден Temp раздел"
+    export EFI_PART="${PLANNED_DEVICE[alt-efi]}"
+    export BOOT_PART="${PLANNED_DEVICE[alt-boot]}"
+    export ROOT_PART="${PLANNED_DEVICE[alt-root]}"
+    export RAW_ROOT="$ROOT_PART"
+    for part in "$EFI_PART" "$BOOT_PART" "$ROOT_PART"; do
+        [[ -b "$part" ]] || quit_on_err "Раздел $part не найден"
+    done
 
     encrypt_root
 }
 
-format_and_create_subvolumes() {
+format_efi() {
     sudo mkfs.vfat -F32 "$EFI_PART" || quit_on_err "Ошибка форматирования EFI"
+}
+
+format_boot() {
     sudo mkfs.ext4 -F "$BOOT_PART" || quit_on_err "Ошибка форматирования Boot"
+}
+
+format_root() {
     sudo mkfs.btrfs -f "$ROOT_PART" || quit_on_err "Ошибка форматирования Root (btrfs)"
-    sudo mkfs.ext4 -F "$TEMP_PART" || quit_on_err "Ошибка форматирования Temp"
+}
 
+create_subvolumes() {
     sudo mkdir -p "/mnt/btrfs-setup" || quit_on_err "Ошибка создания точки монтирования"
     sudo mount -o rw,subvol=/ "$ROOT_PART" "/mnt/btrfs-setup" || quit_on_err "Ошибка монтирования btrfs раздела"
     sudo btrfs subvolume create "/mnt/btrfs-setup/@" || quit_on_err "Ошибка создания подтома @"
     sudo btrfs subvolume create "/mnt/btrfs-setup/@home" || quit_on_err "Ошибка создания подтома @home"
     sudo btrfs subvolume create "/mnt/btrfs-setup/@var" || quit_on_err "Ошибка создания подтома @var"
+    sudo btrfs subvolume create "/mnt/btrfs-setup/$CONTAINERS_SUBVOLUME" || quit_on_err "Ошибка создания подтома $CONTAINERS_SUBVOLUME"
     sudo umount "/mnt/btrfs-setup"
 }
 
-mount_partitions() {
+mount_root() {
     sudo mount --mkdir -o subvol=@ "$ROOT_PART" "/mnt/target" || quit_on_err "Ошибка монтирования подтома @"
+}
+
+mount_boot() {
     sudo mount --mkdir "$BOOT_PART" "/mnt/target/boot" || quit_on_err "Ошибка монтирования Boot"
+}
+
+mount_efi() {
     sudo mount --mkdir "$EFI_PART" "/mnt/target/boot/efi" || quit_on_err "Ошибка монтирования EFI"
-    sudo mount --mkdir "$TEMP_PART" "/var/lib/containers" || quit_on_err "Ошибка монтирования Temp"
+}
+
+# partitions are formatted concurrently, mounted as soon as possible
+prepare_file_systems() {
+    job mkfs-efi "" format_efi
+    job mkfs-boot "" format_boot
+    job mkfs-root "" format_root
+    job subvolumes "mkfs-root" create_subvolumes
+    job mount-root "subvolumes" mount_root
+    job mount-boot "mount-root mkfs-boot" mount_boot
+    job mount-efi "mount-boot mkfs-efi" mount_efi
+    job container-storage "subvolumes" setup_container_storage
+    run_jobs || quit_on_err "Ошибка подготовки файловых систем"
+}
+
+# where the image gets unpacked for bootc: an embedded or staged image is
+# used where it is, otherwise memory if there is enough, otherwise a
+# throwaway subvolume on the target root, removed after installation
+setup_container_storage() {
+    # only the container itself is written then
+    image_is_embedded && return
+    image_is_staged && return
+    local available_kib
+    available_kib=$(awk '/^MemAvailable:/ { print $2 }' /proc/meminfo)
+    if (( available_kib >= RAM_STORAGE_MIN_KIB )); then
+        echo "Образ распаковывается в память"
+        sudo mount --mkdir -t tmpfs -o size=$((available_kib - RAM_STORAGE_RESERVE_KIB))k \
+            tmpfs "/var/lib/containers" || quit_on_err "Ошибка монтирования хранилища образов"
+    else
+        echo "Образ распаковывается во временный подтом $CONTAINERS_SUBVOLUME"
+        sudo mount --mkdir -o subvol="$CONTAINERS_SUBVOLUME" "$ROOT_PART" "/var/lib/containers" \
+            || quit_on_err "Ошибка монтирования хранилища образов"
+    fi
 }
 
 install_system() {
     UUID_BOOT=$(sudo blkid -s UUID -o value "$BOOT_PART") || quit_on_err "Не удалось получить UUID boot"
-    [[ $OSI_USE_ENCRYPTION -eq 0 ]] && export RAW_ROOT=$(sudo blkid -o device -t PARTLABEL=alt-root)
     UUID_ROOT=$(sudo blkid -s UUID -o value "$RAW_ROOT") || quit_on_err "Не удалось получить UUID root"
 
     BOOTC_CMD="bootc install to-filesystem --skip-fetch-check --disable-selinux "
     [[ "$TYPE_BOOT" != "UEFI" ]] && BOOTC_CMD+=" --generic-image "
     [[ "$OSI_USE_ENCRYPTION" -eq 1 ]] && BOOTC_CMD+=" --boot-mount-spec=\"UUID=$UUID_BOOT\" --root-mount-spec=\"/dev/mapper/alt-root\" --karg=\"rd.luks.name=$UUID_ROOT=alt-root rootflags=subvol=@\" "
 
-    sudo podman run --rm --privileged --pid=host \
-        -v "/var/lib/containers":"/var/lib/containers" \
+    local podman=(sudo podman)
+    local store="/var/lib/containers"
+    local embedded_options=()
+    if image_is_embedded; then
+        echo "Используется образ $IMAGE с установочного носителя"
+        podman=(embedded_podman)
+        # bootc reads the image from the same store
+        embedded_options=(
+            -v "$EMBEDDED_STORE":"$EMBEDDED_STORE":ro
+            -v "$EMBEDDED_STORAGE_CONF":"$EMBEDDED_STORAGE_CONF":ro
+            -e CONTAINERS_STORAGE_CONF="$EMBEDDED_STORAGE_CONF"
+        )
+    elif image_is_staged; then
+        echo "Используется заранее загруженный образ $IMAGE"
+        podman=(sudo podman --root "$STAGING_STORE" --runroot "$STAGING_RUNROOT")
+        store="$STAGING_STORE"
+    fi
+
+    # pulled separately to report its progress, finishes an interrupted
+    # prefetch and is a no-op for a complete one
+    if [[ ${#embedded_options[@]} -eq 0 ]]; then
+        osi_phase pull
+        "${podman[@]}" pull $(tls_options) "$IMAGE" 2>&1 | report_pull_progress "$(count_layers)" \
+            || quit_on_err "Ошибка загрузки образа"
+    fi
+
+    osi_phase bootc
+    "${podman[@]}" run --rm --privileged --pid=host $(tls_options) \
+        -v "$store":"/var/lib/containers" \
+        "${embedded_options[@]}" \
         -v /dev:/dev \
         -v "/mnt/target":"/mnt/target" \
-        ghcr.io/alt-gnome/alt-atomic:latest \
+        "$IMAGE" \
         sh -c "\
             [ -f /usr/libexec/init-ostree.sh ] && /usr/libexec/init-ostree.sh; \
             $BOOTC_CMD /mnt/target" || quit_on_err "Ошибка установки системы"
 }
 
-cleanup_temp_and_resize_root() {
+# found devices and the deployment, so configure.sh needs no discovery
+record_outputs() {
+    local deploy_dir="/mnt/target/ostree/deploy/default/deploy"
+    local deploy
+    deploy=$(sudo find "$deploy_dir" -mindepth 1 -maxdepth 1 -type d -name '*.0' | head -n 1)
+
+    osi_output ROOT_PART "$ROOT_PART"
+    osi_output BOOT_PART "$BOOT_PART"
+    osi_output EFI_PART "$EFI_PART"
+    osi_output ROOT_UUID "$(sudo blkid -s UUID -o value "$ROOT_PART")"
+    osi_output BOOT_UUID "$UUID_BOOT"
+    osi_output EFI_UUID "$(sudo blkid -s UUID -o value "$EFI_PART")"
+    [[ -n "$deploy" ]] && osi_output OSTREE_DEPLOY "${deploy#/mnt/target/}"
+}
+
+remove_container_storage() {
     umount_all
     umount_all
 
-    if [[ "$TEMP_PART" == *"/dev/nvme"* ]]; then
-        disk="${TEMP_PART%%p*}"
-        part_number="${TEMP_PART##*p}"
-    else
-        disk="${TEMP_PART%[0-9]*}"
-        part_number="${TEMP_PART#$disk}"
-    fi
-    sudo parted -s "$disk" rm "$part_number" || quit_on_err "Ошибка удаления temp раздела"
-    
-    if [[ "$RAW_ROOT" == *"/dev/nvme"* ]]; then
-        root_disk="${RAW_ROOT%%p*}"
-        root_number="${RAW_ROOT##*p}"
-    else
-        root_disk="${RAW_ROOT%[0-9]*}"
-        root_number="${RAW_ROOT#$root_disk}"
-    fi
-    sudo parted -s "$disk" resizepart "$root_number" 100% || quit_on_err "Ошибка изменения размера root раздела"
-    
-    if [[ "$OSI_USE_ENCRYPTION" -eq 1 ]]; then
-        echo "${OSI_ENCRYPTION_PIN}" | sudo cryptsetup resize alt-root || quit_on_err "Ошибка обновления размера LUKS контейнера"
-    fi
-
-    sudo mount --mkdir "$ROOT_PART" "/mnt/btrfs-root" || quit_on_err "Ошибка монтирования для расширения btrfs"
-    sudo btrfs filesystem resize max "/mnt/btrfs-root" || quit_on_err "Ошибка расширения btrfs"
-    sudo umount "/mnt/btrfs-root"
+    sudo mount --mkdir -o rw,subvol=/ "$ROOT_PART" "/mnt/btrfs-setup" || quit_on_err "Ошибка монтирования btrfs раздела"
+    sudo btrfs subvolume delete "/mnt/btrfs-setup/$CONTAINERS_SUBVOLUME" || quit_on_err "Ошибка удаления подтома $CONTAINERS_SUBVOLUME"
+    sudo umount "/mnt/btrfs-setup"
 }
 
 encrypt_root() {
     if [[ "$OSI_USE_ENCRYPTION" -eq 1 ]]; then
-        export RAW_ROOT=$(sudo blkid -o device -t PARTLABEL=alt-root)
-        [[ -z "$RAW_ROOT" ]] && quit_on_err "Root раздел не найден"
         echo "${OSI_ENCRYPTION_PIN}" | sudo cryptsetup --force-password -q luksFormat "$RAW_ROOT" || quit_on_err "Ошибка шифрования root раздела"
         echo "${OSI_ENCRYPTION_PIN}" | sudo cryptsetup open "$RAW_ROOT" alt-root || quit_on_err "Ошибка открытия зашифрованного раздела"
         export ROOT_PART="/dev/mapper/alt-root"
@@ -194,12 +197,15 @@ umount_all() {
     sudo umount "/var/lib/containers" 2>/dev/null
 }
 
-check_commands
+# required commands are checked by install-check.sh beforehand
+osi_phase partition
 prepare_disk
-format_and_create_subvolumes
-mount_partitions
+osi_phase mkfs
+prepare_file_systems
 install_system
-cleanup_temp_and_resize_root
+record_outputs
+osi_phase cleanup
+remove_container_storage
 umount_all
 sudo sync
 exit 0
@@ -0,0 +1,110 @@
+#!/usr/bin/env bash
+
+# Sourced by the install scripts: runs independent steps concurrently.
+#   job NAME "DEPENDENCIES" COMMAND [ARGS...]   adds a job
+#   run_jobs                                    runs all added jobs
+# A job starts once the jobs it depends on succeeded. Once one fails, no
+# more jobs start and run_jobs fails after the running ones finished.
+# Output is prefixed with the job name, durations are printed.
+
+# bash before 5.1 lacks wait -p, there finished jobs are polled for
+JOB_POLL_INTERVAL=0.05
+
+JOB_NAMES=()
+declare -A JOB_DEPENDENCIES=()
+declare -A JOB_COMMANDS=()
+
+job() {
+    local name=$1 dependencies=$2
+    shift 2
+    JOB_NAMES+=("$name")
+    JOB_DEPENDENCIES[$name]=$dependencies
+    JOB_COMMANDS[$name]=$(printf '%q ' "$@")
+}
+
+_now_ms() {
+    local now=${EPOCHREALTIME/[.,]/}
+    echo $(( ${now:-$(date +%s%6N)} / 1000 ))
+}
+
+# runs in its own subshell, so quit_on_err only ends the job
+_run_job() {
+    local name=$1 start status result="готово"
+    start=$(_now_ms)
+    eval "${JOB_COMMANDS[$name]}" 2>&1 | sed -u "s/^/[$name] /"
+    status=${PIPESTATUS[0]}
+    (( status == 0 )) || result="ошибка"
+    echo "[$name] $result за $(( $(_now_ms) - start )) мс"
+    return "$status"
+}
+
+_job_is_ready() {
+    local dependency
+    for dependency in ${JOB_DEPENDENCIES[$1]}; do
+        [[ "${JOB_STATES[$dependency]}" == "done" ]] || return 1
+    done
+}
+
+# waits for whichever of the given jobs finishes first, sets the caller's pid
+_wait_any_job() {
+    if (( BASH_VERSINFO[0] > 5 || (BASH_VERSINFO[0] == 5 && BASH_VERSINFO[1] >= 1) )); then
+        wait -n -p pid "$@"
+        return
+    fi
+
+    local job
+    while :; do
+        for job in "$@"; do
+            kill -0 "$job" 2>/dev/null && continue
+            pid=$job
+            wait "$job"
+            return
+        done
+        sleep "$JOB_POLL_INTERVAL"
+    done
+}
+
+run_jobs() {
+    declare -gA JOB_STATES=()
+    # pid -> name of running jobs
+    local -A job_names=()
+    local name pid failed="" start
+    start=$(_now_ms)
+
+    while :; do
+        if [[ -z "$failed" ]]; then
+            for name in "${JOB_NAMES[@]}"; do
+                [[ -z "${JOB_STATES[$name]}" ]] && _job_is_ready "$name" || continue
+                _run_job "$name" &
+                job_names[$!]=$name
+                JOB_STATES[$name]=running
+            done
+        fi
+        (( ${#job_names[@]} == 0 )) && break
+
+        if _wait_any_job "${!job_names[@]}"; then
+            JOB_STATES[${job_names[$pid]}]=done
+        else
+            JOB_STATES[${job_names[$pid]}]=failed
+            failed+=" ${job_names[$pid]}"
+        fi
+        unset "job_names[$pid]"
+    done
+
+    echo "Задачи выполнены за $(( $(_now_ms) - start )) мс"
+    local skipped=""
+    for name in "${JOB_NAMES[@]}"; do
+        [[ -z "${JOB_STATES[$name]}" ]] && skipped+=" $name"
+    done
+    JOB_NAMES=()
+    JOB_DEPENDENCIES=()
+    JOB_COMMANDS=()
+
+    if [[ -n "$failed" ]]; then
+        echo "Ошибка в задачах:$failed" >&2
+        return 1
+    elif [[ -n "$skipped" ]]; then
+        echo "Задачи не запущены:$skipped" >&2
+        return 1
+    fi
+}
@@ -0,0 +1,161 @@
+#!/usr/bin/env bash
+
+# Sourced by install.sh: plans an aligned partition layout from the block
+# topology in sysfs and writes it with a single sfdisk call.
+# Run directly to print the plan for a disk without writing it:
+#   partition-plan.sh DISK [UEFI|LEGACY]
+# Loop devices work as DISK, e.g. for 4Kn: losetup -f --show --sector-size 4096 FILE
+
+GPT_BIOS_BOOT=21686148-6449-6E6F-744E-656564454649
+GPT_EFI=C12A7328-F81F-11D2-BA4B-00A0C93EC93B
+GPT_LINUX=0FC63DAF-8483-4772-8E79-3D69D8477DE4
+
+MIB=$((1024 * 1024))
+# kept free at the end of the disk for the backup GPT
+GPT_BACKUP_BYTES=$MIB
+
+# partitions in order on disk, as label:size in MiB:type
+# the last one fills the remaining space, its size is the minimum
+# root also holds the unpacked image during installation, see install.sh
+layout_entries() {
+    if [[ "$1" == "LEGACY" ]]; then
+        echo "alt-bios:2:$GPT_BIOS_BOOT"
+        echo "alt-efi:1000:$GPT_EFI"
+    else
+        echo "alt-efi:600:$GPT_EFI"
+    fi
+    echo "alt-boot:2000:$GPT_LINUX"
+    echo "alt-root:30000:$GPT_LINUX"
+}
+
+# sets SECTOR_SIZE (bytes), GRAIN and ALIGN_OFFSET (sectors), DISK_SECTORS
+read_topology() {
+    local name
+    name=$(basename "$(readlink -f "$1")")
+    local block="/sys/class/block/$name"
+    [[ -d "$block/queue" ]] || return 1
+
+    SECTOR_SIZE=$(cat "$block/queue/logical_block_size")
+    local physical optimal offset
+    physical=$(cat "$block/queue/physical_block_size")
+    optimal=$(cat "$block/queue/optimal_io_size")
+    offset=$(cat "$block/alignment_offset")
+
+    local grain=$MIB
+    (( physical > grain )) && grain=$physical
+    # bridges often report bogus values, only powers of two are used
+    if (( optimal > grain && (optimal & (optimal - 1)) == 0 )); then
+        grain=$optimal
+    fi
+    GRAIN=$((grain / SECTOR_SIZE))
+    # -1 means the device can't be aligned
+    (( offset < 0 )) && offset=0
+    ALIGN_OFFSET=$(( (offset / SECTOR_SIZE) % GRAIN ))
+    # sysfs reports the size in 512 byte units regardless of sector size
+    DISK_SECTORS=$(( $(cat "$block/size") * 512 / SECTOR_SIZE ))
+}
+
+align_up() {
+    local sector=$(( $1 - ALIGN_OFFSET ))
+    (( sector < 0 )) && sector=0
+    echo $(( (sector + GRAIN - 1) / GRAIN * GRAIN + ALIGN_OFFSET ))
+}
+
+# partition device name, e.g. sda1 but nvme0n1p1
+partition_device() {
+    if [[ "$1" == *[0-9] ]]; then
+        echo "${1}p$2"
+    else
+        echo "$1$2"
+    fi
+}
+
+# plans the layout into sectors first..last, using the given partition numbers
+# sets PLAN to sfdisk script lines and PLANNED_DEVICE[label] to device paths
+plan_partitions() {
+    local disk=$1 boot_type=$2 first=$3 last=$4
+    local numbers=($5)
+    local start size label mib type index=0 count=${#numbers[@]}
+    declare -gA PLANNED_DEVICE=()
+    PLAN=""
+
+    start=$(align_up "$first")
+    while IFS=: read -r label mib type; do
+        size=$(( mib * MIB / SECTOR_SIZE ))
+        size=$(( (size + GRAIN - 1) / GRAIN * GRAIN ))
+        if (( index == count - 1 && start + size - 1 <= last )); then
+            size=$(( (last + 1 - start) / GRAIN * GRAIN ))
+        fi
+        if (( start + size - 1 > last )); then
+            echo "Разметка не помещается: $label" >&2
+            return 1
+        fi
+        local device
+        device=$(partition_device "$disk" "${numbers[$index]}")
+        PLAN+="$device : start=$start, size=$size, type=$type, name=\"$label\""$'\n'
+        PLANNED_DEVICE[$label]=$device
+        start=$(( start + size ))
+        index=$((index + 1))
+    done <<< "$(layout_entries "$boot_type")"
+}
+
+# whole disk: new table, partitions numbered from 1
+plan_disk() {
+    local disk=$1 boot_type=$2
+    read_topology "$disk" || return 1
+    local last=$(( DISK_SECTORS - GPT_BACKUP_BYTES / SECTOR_SIZE - 1 ))
+    local count
+    count=$(layout_entries "$boot_type" | wc -l)
+    PLAN_HEADER="label: gpt"
+    plan_partitions "$disk" "$boot_type" "$GRAIN" "$last" "$(seq -s ' ' 1 "$count")"
+}
+
+# single partition: replaced by the layout within its bounds, the rest of
+# the table is kept as it is
+plan_partition() {
+    local partition=$1 boot_type=$2
+    local disk
+    disk="/dev/$(lsblk -no pkname "$partition" 2>/dev/null | head -n 1)"
+    read_topology "$disk" || return 1
+
+    local dump
+    dump=$(sudo sfdisk -d "$disk") || return 1
+    local line
+    line=$(grep "^$partition :" <<< "$dump") || return 1
+    local start size
+    start=$(sed -n 's/.*start= *\([0-9]*\).*/\1/p' <<< "$line")
+    size=$(sed -n 's/.*size= *\([0-9]*\).*/\1/p' <<< "$line")
+    [[ -n "$start" && -n "$size" ]] || return 1
+
+    # lowest numbers not used by the partitions that are kept
+    PLAN_HEADER=$(grep -v "^$partition :" <<< "$dump")
+    local used numbers=() number=1 count
+    used=" $(grep -o '^/dev/[^ ]*' <<< "$PLAN_HEADER" | grep -o '[0-9]*$' | tr '\n' ' ') "
+    count=$(layout_entries "$boot_type" | wc -l)
+    while (( ${#numbers[@]} < count )); do
+        [[ "$used" != *" $number "* ]] && numbers+=("$number")
+        number=$((number + 1))
+    done
+
+    plan_partitions "$disk" "$boot_type" "$start" "$((start + size - 1))" "${numbers[*]}"
+    PLAN_DISK=$disk
+}
+
+# writes the planned table in one go and waits for udev once
+apply_plan() {
+    local disk=$1
+    shift
+    printf '%s\n%s' "$PLAN_HEADER" "$PLAN" | sudo sfdisk --quiet "$@" "$disk" || return 1
+    sudo udevadm settle
+}
+
+if [[ "${BASH_SOURCE[0]}" == "$0" ]]; then
+    [[ -b "$1" ]] || { echo "Usage: $0 DISK [UEFI|LEGACY]" >&2; exit 1; }
+    if [[ -d "/sys/class/block/$(basename "$(readlink -f "$1")")/partition" ]]; then
+        plan_partition "$1" "${2:-UEFI}" || exit 1
+    else
+        plan_disk "$1" "${2:-UEFI}" || exit 1
+    fi
+    echo "# sector size $SECTOR_SIZE, alignment $GRAIN sectors, offset $ALIGN_OFFSET"
+    printf '%s\n%s' "$PLAN_HEADER" "$PLAN"
+fi
@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+
+# Sourced by the install scripts: reports phases and progress to the installer
+# through the pipe it passes as OSI_PROGRESS_FIFO. Does nothing without it.
+
+# opening a pipe blocks until read, the installer might not be listening
+_osi_send() {
+    [[ -p "$OSI_PROGRESS_FIFO" ]] || return 1
+    timeout 1 bash -c 'echo "$1" > "$2"' _ "$1" "$OSI_PROGRESS_FIFO" 2>/dev/null
+}
+
+# starts a phase, ending the previous one
+# early sub-steps run before the installer listens, their phase gets sent
+# along with the first progress it receives
+osi_phase() {
+    OSI_PHASE=$1
+    _osi_send "phase $1" && OSI_PHASE_SENT=1 || OSI_PHASE_SENT=0
+    return 0
+}
+
+# progress within the current phase: done, total
+osi_progress() {
+    if [[ "$OSI_PHASE_SENT" == 0 ]]; then
+        osi_phase "$OSI_PHASE"
+        [[ "$OSI_PHASE_SENT" == 1 ]] || return 0
+    fi
+    _osi_send "progress $1 $2"
+    return 0
+}
@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+
+# Sourced by the install scripts: passes values on to later steps, which get
+# them as OSI_OUT_<KEY> in their environment. Does nothing without the installer.
+
+# key, single line value
+osi_output() {
+    [[ -n "$OSI_STEP_OUTPUT" ]] && echo "$1=$2" >> "$OSI_STEP_OUTPUT"
+    return 0
+}
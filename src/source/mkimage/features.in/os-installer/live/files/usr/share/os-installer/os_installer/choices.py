@@ -34,8 +34,11 @@ class ChoicesPage(Gtk.Box):
                 print("Unknown choice type!")
                 exit(0)
 
-        self.model.splice(0, 0, self.list_provider())
         self.list.bind_model(self.model, self._create_row)
+        choices_provider.when_preloaded(self._fill_list)
+
+    def _fill_list(self):
+        self.model.splice(0, 0, self.list_provider())
 
     def _create_row(self, choice):
         if choice.options:
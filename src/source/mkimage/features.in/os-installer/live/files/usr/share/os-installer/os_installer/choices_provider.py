@@ -88,7 +88,8 @@ def handle_choices(config_entries):
 
 class ChoicesProvider(Preloadable):
     def __init__(self):
-        Preloadable.__init__(self, self._get_choices)
+        Preloadable.__init__(self, self._get_choices,
+                             needed_by=['software', 'feature'])
 
     def _get_choices(self):
         feature_choices = handle_choices(config.get('additional_features'))
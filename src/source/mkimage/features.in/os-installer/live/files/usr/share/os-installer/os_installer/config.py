@@ -1,8 +1,12 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from threading import Lock
+from contextlib import contextmanager
+from threading import Lock, current_thread, local, main_thread
+from weakref import ref
 import yaml
 
+from gi.repository import GLib
+
 DEFAULT_CONFIG_PATH = '/etc/os-installer/config.yaml'
 
 
@@ -24,6 +28,9 @@ default_config = {
     'disk_encryption': {'offered': True, 'forced': False, 'min_length': 1, 'confirmation': False},
     # desktop
     'desktop': [],
+    # installation
+    'container_image': 'ghcr.io/alt-gnome/alt-atomic:latest',
+    'image_prefetch': True,
     # user
     'user': {'min_password_length': 1, 'request_username': False, 'provide_autologin': False, 'password_confirmation': False},
     # optional pages
@@ -51,6 +58,8 @@ legacy_values = {
 # not configurable via config file
 internal_values = {
     'installation_running': False,
+    # fraction, current phase, estimated seconds left
+    'installation_progress': (0, None, 0),
     'internet_connection': False,
     'use_encryption': False,
     'encryption_pin': '',
@@ -78,6 +87,12 @@ fallback_values = {
 }
 
 
+# notifications from other threads are run in idle sources of this priority
+notification_priorities = {
+    'displayed-page': GLib.PRIORITY_HIGH_IDLE,
+}
+
+
 def _match(variables, var, *ok_types):
     if not var in variables:
         print(f'Config error: {var} does not exist.')
@@ -102,6 +117,8 @@ def _validate(variables):
         _match(variables, 'internet_checker_url', str) and
         _match(variables, 'suggested_languages', list) and
         _match(variables, 'minimum_disk_size', int) and
+        _match(variables, 'container_image', str) and
+        _match(variables, 'image_prefetch', bool) and
         _match(variables, 'disk_encryption', dict) and
         _match(variables['disk_encryption'], 'offered', bool) and
         _match(variables['disk_encryption'], 'forced', bool) and
@@ -118,11 +135,29 @@ def _validate(variables):
         _match(variables, 'fixed_language', bool, str))
 
 
+def _subscription_owner(func):
+    # bound methods are owned by their object and only referenced weakly
+    if hasattr(func, '__func__'):
+        return func.__self__
+    return None
+
+
 class Config:
     def __init__(self):
         self.variables = default_config
         self.subscription_lock = Lock()
+        # variable -> {key -> (owner reference or None, function)}, ordered
+        # by subscription
         self.subscriptions = {}
+        # owner id -> {(variable, key)}
+        self.owned_subscriptions = {}
+        # variable -> tuple of subscription values, dropped on change and
+        # rebuilt on the next notification
+        self.subscriber_snapshots = {}
+        # (owner id, variable, key) of garbage collected owners
+        self.dead_subscriptions = []
+        # per thread, variables set during a batch
+        self.batch_state = local()
 
         try:
             with open(DEFAULT_CONFIG_PATH, 'r') as file:
@@ -161,18 +196,89 @@ class Config:
         GIGABYTE_FACTOR = 1000 * 1000 * 1000
         self.variables['minimum_disk_size'] *= GIGABYTE_FACTOR
 
+    def _remove_subscription(self, variable, key):
+        # called with subscription lock held
+        if key in (subscriptions := self.subscriptions.get(variable, {})):
+            del subscriptions[key]
+            self.subscriber_snapshots.pop(variable, None)
+
+    def _remove_dead_subscriptions(self):
+        # called with subscription lock held
+        while self.dead_subscriptions:
+            owner_id, variable, key = self.dead_subscriptions.pop()
+            if owned := self.owned_subscriptions.get(owner_id):
+                owned.discard((variable, key))
+                if not owned:
+                    del self.owned_subscriptions[owner_id]
+            self._remove_subscription(variable, key)
+
+    def _notify(self, variable, new_value):
+        if (pending := getattr(self.batch_state, 'pending', None)) is not None:
+            # keep order of first change, but deliver last value
+            pending[variable] = new_value
+        else:
+            self._update_subscribers(variable, new_value)
+
+    def _get_subscribers(self, variable):
+        # snapshots are immutable, only building them needs the lock
+        if (snapshot := self.subscriber_snapshots.get(variable)) is None:
+            with self.subscription_lock:
+                snapshot = tuple(self.subscriptions.get(variable, {}).values())
+                self.subscriber_snapshots[variable] = snapshot
+        return snapshot
+
+    def _call_subscribers(self, variable, new_value):
+        # dereferencing the owner is cheaper than a weak method
+        for owner_ref, func in self._get_subscribers(variable):
+            if owner_ref is None:
+                func(new_value)
+            elif (owner := owner_ref()) is not None:
+                func(owner, new_value)
+        return GLib.SOURCE_REMOVE
+
     def _update_subscribers(self, variable, new_value):
-        subscribers = []
-        with self.subscription_lock:
-            if variable in self.subscriptions:
-                subscribers = self.subscriptions[variable]
-        for func in subscribers:
-            func(new_value)
+        if not self.subscriptions.get(variable):
+            return
+        if current_thread() is main_thread():
+            self._call_subscribers(variable, new_value)
+        else:
+            # subscribers touch widgets, only do so from the main loop
+            priority = notification_priorities.get(
+                variable, GLib.PRIORITY_DEFAULT_IDLE)
+            GLib.idle_add(self._call_subscribers, variable, new_value,
+                          priority=priority)
 
     ### public methods ###
 
+    @contextmanager
+    def batch(self):
+        '''
+        Defers notifications for variables set in this thread until the
+        outermost batch ends. Each changed variable is delivered once, with
+        its final value.
+        '''
+        if getattr(self.batch_state, 'pending', None) is not None:
+            yield
+            return
+
+        self.batch_state.pending = {}
+        try:
+            yield
+        finally:
+            pending = self.batch_state.pending
+            self.batch_state.pending = None
+            for variable, new_value in pending.items():
+                self._update_subscribers(variable, new_value)
+
     def bump(self, variable):
-        self._update_subscribers(variable, self.get(variable))
+        self._notify(variable, self.get(variable))
+
+    def defer(self, func, *args):
+        '''Run func in the main loop once the current callback returned.'''
+        def run_once():
+            func(*args)
+            return GLib.SOURCE_REMOVE
+        GLib.idle_add(run_once, priority=GLib.PRIORITY_HIGH_IDLE)
 
     def get(self, variable):
         if variable in self.variables:
@@ -193,7 +299,7 @@ class Config:
 
         self.variables[variable] = new_value
 
-        self._update_subscribers(variable, new_value)
+        self._notify(variable, new_value)
 
         return True
 
@@ -206,11 +312,29 @@ class Config:
             return self.variables.pop(variable)
 
     def subscribe(self, variable, func, delayed=False):
+        '''
+        Subscriptions of bound methods end when their object is garbage
+        collected or unsubscribed.
+        '''
+        owner = _subscription_owner(func)
+        if owner is not None:
+            owner_id = id(owner)
+            key = (owner_id, func.__func__)
+            owner_ref = ref(owner, lambda _: self.dead_subscriptions.append(
+                (owner_id, variable, key)))
+            subscription = (owner_ref, func.__func__)
+        else:
+            key = func
+            subscription = (None, func)
+
         with self.subscription_lock:
-            if variable in self.subscriptions:
-                self.subscriptions[variable].append(func)
-            else:
-                self.subscriptions[variable] = [func]
+            self._remove_dead_subscriptions()
+            subscriptions = self.subscriptions.setdefault(variable, {})
+            subscriptions[key] = subscription
+            self.subscriber_snapshots.pop(variable, None)
+            if owner is not None:
+                self.owned_subscriptions.setdefault(owner_id, set()).add(
+                    (variable, key))
         if delayed:
             return
         if variable in self.variables:
@@ -220,10 +344,9 @@ class Config:
 
     def unsubscribe(self, obj):
         with self.subscription_lock:
-            for subs in self.subscriptions.values():
-                for func in subs:
-                    if func.__self__ == obj:
-                        subs.remove(func)
+            for variable, key in self.owned_subscriptions.pop(id(obj), ()):
+                self._remove_subscription(variable, key)
+            self._remove_dead_subscriptions()
 
 
 config = Config()
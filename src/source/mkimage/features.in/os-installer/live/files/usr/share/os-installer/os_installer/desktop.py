@@ -22,6 +22,9 @@ class DesktopPage(Gtk.Box):
         self.button_label = self.continue_button.get_label()
         self.selected_entry = None
 
+        desktop_provider.when_preloaded(self._fill_grid)
+
+    def _fill_grid(self):
         number = 0
         for desktop in desktop_provider.get_desktops():
             entry = DesktopEntry(desktop)
@@ -47,6 +50,12 @@ class DesktopPage(Gtk.Box):
 
         config.set('desktop_chosen', desktop.keyword)
 
+    def retranslated(self, retranslator):
+        self.button_label = retranslator.retranslate_text(self.button_label)
+        if self.selected_entry:
+            desktop = self.selected_entry.desktop
+            self.continue_button.set_label(self.button_label.format(desktop.name))
+
     ### callbacks ###
 
     def _desktop_activated(self, button):
@@ -18,7 +18,7 @@ class Desktop(NamedTuple):
 
 class DesktopProvider(Preloadable):
     def __init__(self):
-        Preloadable.__init__(self, self._get_desktops)
+        Preloadable.__init__(self, self._get_desktops, needed_by=['desktop'])
 
     def _get_desktops(self):
         self.desktops: list = []
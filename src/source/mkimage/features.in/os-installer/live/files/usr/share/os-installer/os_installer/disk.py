@@ -25,6 +25,11 @@ class DiskPage(Gtk.Stack):
         self.disk_list.bind_model(
             self.disk_list_model, self._create_device_row)
 
+        disk_provider.when_preloaded(self._update_disks)
+        # disks that are plugged in or removed show up without reloading
+        config.subscribe('disks', self._update_disks, delayed=True)
+
+    def _update_disks(self, *args):
         if disks := disk_provider.get_disks():
             reset_model(self.disk_list_model, disks)
             self.set_visible_child_name('disks')
@@ -1,8 +1,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from random import getrandbits
+from threading import Lock
 
-from gi.repository import GLib, GObject
+from gi.repository import GObject
 
 from .config import config
 from .preloadable import Preloadable
@@ -42,31 +43,45 @@ class Disk(DeviceInfo):
 
 
 class DiskProvider(Preloadable):
+    '''
+    Keeps an inventory of disks that is updated whenever UDisks reports a
+    change. UDisks coalesces added, removed and changed objects into the
+    "changed" signal of its client. The inventory is built from the objects
+    cached by the client, so no D-Bus calls are made.
+    '''
 
     EFI_PARTITION_GUID = 'C12A7328-F81F-11D2-BA4B-00A0C93EC93B'
     EFI_PARTITON_FLAGS = None
 
     def __init__(self):
-        Preloadable.__init__(self, self._init_client)
+        Preloadable.__init__(self, self._init_client,
+                             needed_by=['disk', 'partition'])
+        self.inventory_lock = Lock()
+        self.disks = []
+        self.block_devices = set()
+        self.signature = None
 
     def _init_client(self):
         # avoids initializing udisks client in demo mode
-        self.use_dummy_implementation = config.get('demo_mode')
-        if self.use_dummy_implementation:
-            return
-
-        import gi                            # noqa: E402
-        gi.require_version('UDisks', '2.0')  # noqa: E402
-        from gi.repository import UDisks
-        self.EFI_PARTITON_FLAGS = UDisks.PartitionTypeInfoFlags.SYSTEM.numerator
-        self.udisks_client = UDisks.Client.new_sync()
+        if config.get('demo_mode'):
+            from .udisks_stand_in import create_demo_client
+            self.udisks_client = create_demo_client()
+        else:
+            import gi                            # noqa: E402
+            gi.require_version('UDisks', '2.0')  # noqa: E402
+            from gi.repository import UDisks
+            self.EFI_PARTITON_FLAGS = UDisks.PartitionTypeInfoFlags.SYSTEM.numerator
+            self.udisks_client = UDisks.Client.new_sync()
+
+        self._update_inventory()
+        self.udisks_client.connect('changed', self._udisks_changed)
 
     def _get_one_partition(self, partition, block):
         # partition info
         partition_info = DeviceInfo(
             name=block.props.id_label,
             size=block.props.size,
-            size_text=self.disk_size_to_str(block.props.size),
+            size_text=self._size_to_str(block.props.size),
             device_path=block.props.device,
             is_efi=partition.props.type.upper() == self.EFI_PARTITION_GUID)
 
@@ -96,95 +111,73 @@ class DiskProvider(Preloadable):
         disk = Disk(
             name=(drive.props.vendor + ' ' + drive.props.model).strip(),
             size=block.props.size,
-            size_text=self.disk_size_to_str(block.props.size),
+            size_text=self._size_to_str(block.props.size),
             device_path=block.props.device,
             partitions=self._get_partitions(partition_table))
 
         return disk
 
-    def _get_dummy_disks(self):
-        return [
-            Disk("Dummy", 10000, "10 KB", "/dev/null",
-                 [DeviceInfo("Too small partiton", 1000, "1 KB", "/dev/00null")]),
-            Disk("Totally real device", 100000000000, "100 GB", "/dev/sda", [
-                DeviceInfo("EFI", 200000000, "2 GB", "/dev/sda_efi", True),
-                DeviceInfo("Previous Installation", 20000000000, "40 GB",
-                           "/dev/sda_yes"),
-                DeviceInfo(None, 20000000000, "30 GB", "/dev/sda_unnamed"),
-                DeviceInfo(None, 20000000000, "20 GB", "/dev/sda_unnamed2"),
-                DeviceInfo("Swap", 20000000000, "8 GB", '/dev/sda_swap'),
-            ]),
-            Disk("VERY BIG DISK", 1000000000000000, "1000 TB",
-                 "/dev/sdb_very_big", []),
-        ]
+    def _size_to_str(self, size):
+        return self.udisks_client.get_size_for_display(size, False, False)
 
-    ### public methods ###
+    def _update_inventory(self):
+        disks = []
+        block_devices = set()
+        signature = set()
+        for udisks_object in self.udisks_client.get_object_manager().get_objects():
+            block = udisks_object.get_block()
+            if not block:
+                continue
+            block_devices.add(block.props.device)
+            signature.add((block.props.device, block.props.size, block.props.id_label))
 
-    def disk_exists(self, dev_info: DeviceInfo):
-        self.assert_preloaded()
+            # skip partitions
+            if udisks_object.get_partition():
+                continue
 
-        if self.use_dummy_implementation:
-            return True
+            partition_table = udisks_object.get_partition_table()
+            drive = self.udisks_client.get_drive_for_block(block)
+            if drive and not drive.props.optical:
+                disk_info = self._get_disk_info(block, drive, partition_table)
+                disks.append(disk_info)
+        disks.sort(key=lambda disk: disk.device_path)
 
-        # check against all available devices
-        dummy_var = GLib.Variant('a{sv}', None)
-        manager = self.udisks_client.get_manager()
-        devices = manager.call_get_block_devices_sync(dummy_var, None)
-        for device in devices:
-            if ((udisks_object := self.udisks_client.get_object(device)) and
-                (block := udisks_object.get_block()) and
-                    block.props.device == dev_info.device_path):
-                return True
+        with self.inventory_lock:
+            # changes of e.g. mount state do not concern the disk list
+            if signature == self.signature:
+                return
+            self.disks = disks
+            self.block_devices = block_devices
+            self.signature = signature
+        config.set('disks', disks)
 
-        return False
+    ### callbacks ###
 
-    def disk_size_to_str(self, size):
+    def _udisks_changed(self, client):
+        # signal arrives on the main context
+        self._update_inventory()
+
+    ### public methods ###
+
+    def disk_exists(self, dev_info: DeviceInfo):
         self.assert_preloaded()
 
-        if self.use_dummy_implementation:
-            # fake it till you make it
-            return f"{size / 1000000000:.1f} GB"
+        with self.inventory_lock:
+            return dev_info.device_path in self.block_devices
 
-        return self.udisks_client.get_size_for_display(size, False, False)
+    def disk_size_to_str(self, size):
+        self.assert_preloaded()
+        return self._size_to_str(size)
 
     def get_disks(self):
         self.assert_preloaded()
 
-        if self.use_dummy_implementation:
-            return self._get_dummy_disks()
-
         if config.get('test_mode') and getrandbits(3) == 7:
             print("test-mode: randomly chose that no disks are available")
             return []
 
-        # get available devices
-        dummy_var = GLib.Variant('a{sv}', None)
-        manager = self.udisks_client.get_manager()
-        devices = manager.call_get_block_devices_sync(dummy_var, None)
-
-        # get device information
-        disks = []
-        for device in devices:
-            udisks_object = self.udisks_client.get_object(device)
-            if not udisks_object:
-                continue
-
-            # skip partitions
-            partition = udisks_object.get_partition()
-            if partition:
-                continue
-
-            block = udisks_object.get_block()
-            if not block:
-                continue
-
-            partition_table = udisks_object.get_partition_table()
-            drive = self.udisks_client.get_drive_for_block(block)
-            if drive and not drive.props.optical:
-                disk_info = self._get_disk_info(block, drive, partition_table)
-                disks.append(disk_info)
-
-        return disks
+        with self.inventory_lock:
+            return self.disks
 
 
 disk_provider = DiskProvider()
@@ -5,6 +5,7 @@ import re
 from gi.repository import GLib, Gtk
 
 from .config import config
+from .installation_progress import installation_progress
 from .installation_step import InstallationStep
 
 
@@ -52,7 +53,12 @@ def create_envs(installation_step: InstallationStep):
     with_configure_envs = installation_step is InstallationStep.configure
     with_install_envs = installation_step is InstallationStep.install or with_configure_envs
 
-    envs = []
+    # also used by early sub-steps, so independent of choices
+    envs = [
+        f'OSI_CONTAINER_IMAGE={_get("container_image")}',
+        f'OSI_IMAGE_PREFETCH={_get("image_prefetch")}',
+        f'OSI_PROGRESS_FIFO={installation_progress.get_fifo_path()}',
+    ]
     if with_install_envs:
         envs += [
             f'OSI_DESKTOP={_get("desktop_chosen")}',
@@ -7,7 +7,7 @@ from .config import config
 from .format_provider import format_provider
 from .system_calls import set_system_formats, set_system_timezone
 from .timezone_provider import timezone_provider
-from .widgets import ProgressRow
+from .widgets import RecyclingList
 
 
 class FilterType(Enum):
@@ -31,21 +31,41 @@ class FilterPage(Gtk.Box):
         Gtk.Box.__init__(self, **kwargs)
 
         self.type = filter_type
+        self.loaded = False
         match self.type:
             case FilterType.format:
                 self.filter = self._format_filter
-                self.list_model.splice(0, 0, format_provider.get_formats())
+                self.provider = format_provider
             case FilterType.timezone:
                 self.filter = self._timezone_filter
-                self.list_model.splice(0, 0, timezone_provider.get_timezones())
+                self.provider = timezone_provider
+                self.previous_search_text = ''
+                self.matching_timezones = None
 
         self.search_entry.connect("search-changed", self._filter)
 
-        self.list.bind_model(
-            self.filter_list_model, lambda f: ProgressRow(f.name))
+        self.list = RecyclingList(
+            self.list, self.filter_list_model, self._item_selected)
+        self.provider.when_preloaded(self._fill_list)
+
+    def _fill_list(self):
+        match self.type:
+            case FilterType.format:
+                self.list_model.splice(0, 0, format_provider.get_formats())
+            case FilterType.timezone:
+                self.list_model.splice(0, 0, timezone_provider.get_timezones())
+        self.loaded = True
+        if self.search_entry.get_text():
+            self._filter()
 
     def _filter(self, *args):
+        # filtered once list is filled
+        if not self.loaded:
+            return
+
         self.search_text = self.search_entry.get_text().lower()
+        if self.type == FilterType.timezone:
+            self._update_matching_timezones()
         self.custom_filter.set_filter_func(self.filter)
 
         if self.filter_list_model.get_n_items() > 0:
@@ -56,25 +76,32 @@ class FilterPage(Gtk.Box):
     def _format_filter(self, format):
         return self.search_text in format.lower_case_name or format.locale.startswith(self.search_text)
 
+    def _update_matching_timezones(self):
+        # extending the previous query can only narrow down its matches
+        candidates = None
+        if self.previous_search_text and self.previous_search_text in self.search_text:
+            candidates = self.matching_timezones
+        self.matching_timezones = timezone_provider.search_timezones(
+            self.search_text, candidates)
+        self.previous_search_text = self.search_text
+
     def _timezone_filter(self, timezone):
-        if self.search_text in timezone.lower_case_name:
-            return True
-        for location in timezone.locations:
-            if self.search_text in location:
-                return True
-        return False
+        return timezone.name in self.matching_timezones
 
     ### callbacks ###
 
-    @Gtk.Template.Callback('row_selected')
-    def _row_selected(self, list_box, row):
+    def _item_selected(self, item):
         match self.type:
             case FilterType.format:
-                set_system_formats(row.info, row.get_title())
+                set_system_formats(item.locale, item.name)
             case FilterType.timezone:
-                set_system_timezone(row.get_title())
+                set_system_timezone(item.name)
         config.set_next_page(self)
 
+    @Gtk.Template.Callback('row_selected')
+    def _row_selected(self, list_box, row):
+        '''Connected by the precompiled template, whose list box never gets rows.'''
+
 
 FormatPage = lambda **args: FilterPage(FilterType.format, **args)
 TimezonePage = lambda **args: FilterPage(FilterType.timezone, **args)
@@ -1,5 +1,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
 import locale as Locale
 
 from gi.repository import GnomeDesktop, GObject
@@ -46,6 +50,13 @@ locales = {
     'nl_AW.UTF-8', 'zh_TW.UTF-8', 'ht_HT.UTF-8', 'ar_LY.UTF-8', 'de_DE.UTF-8', 'ml_IN.UTF-8', 'sl_SI.UTF-8',
     'tr_CY.UTF-8', 'ar_KW.UTF-8', 'uz_UZ.UTF-8', 'ku_TR.UTF-8', 'en_CA.UTF-8', 'ar_LB.UTF-8', 'iu_CA.UTF-8',
     'aa_DJ.UTF-8', 'so_SO.UTF-8'}
+sorted_locales = sorted(locales)
+
+
+# number of translation locales whose formats are kept in memory
+FORMATS_MEMO_SIZE = 8
+# country names are looked up in this many chunks concurrently
+NAME_LOOKUP_WORKERS = 4
 
 
 class Format(GObject.Object):
@@ -64,9 +75,18 @@ class Format(GObject.Object):
 
 class FormatProvider(Preloadable):
     def __init__(self):
-        Preloadable.__init__(self, self._initialize_formats, 'locale')
+        Preloadable.__init__(self, self._initialize_formats, 'locale',
+                             needed_by=['format'])
+        self.formats = []
+        self.memo = OrderedDict()
+        self.memo_lock = Lock()
+        # separate from the preload pool, which runs the calling task
+        self.lookup_pool = ThreadPoolExecutor(max_workers=NAME_LOOKUP_WORKERS)
 
     def _initialize_formats(self, translation_locale):
+        if self.is_superseded(translation_locale):
+            return
+
         name = GnomeDesktop.get_country_from_locale(translation_locale)
         if not name:
             # solely to prevent crashes, e.g. for Esperanto
@@ -74,19 +94,62 @@ class FormatProvider(Preloadable):
             name = 'Undefined'
         set_system_formats(translation_locale, name)
 
-        self.formats = []
+        with self.memo_lock:
+            formats = self.memo.get(translation_locale)
+            if formats is not None:
+                self.memo.move_to_end(translation_locale)
+
+        if formats is None:
+            formats = self.load_cached(
+                f'formats-{translation_locale}', translation_locale,
+                lambda: self._get_all_formats(translation_locale),
+                lambda format: (format.name, format.locale),
+                lambda entry: Format(*entry), libraries=['libgnome-desktop'])
+            if formats is None:
+                return
+            self._memoize(translation_locale, formats)
+
+        if not self.is_superseded(translation_locale):
+            self.formats = formats
+
+    def _memoize(self, translation_locale, formats):
+        with self.memo_lock:
+            self.memo[translation_locale] = formats
+            self.memo.move_to_end(translation_locale)
+            while len(self.memo) > FORMATS_MEMO_SIZE:
+                self.memo.popitem(last=False)
+
+    def _lookup_names(self, translation_locale, locale_chunk):
+        entries = []
+        for locale in locale_chunk:
+            if self.is_superseded(translation_locale):
+                return entries
+            name = GnomeDesktop.get_country_from_locale(locale, translation_locale)
+            if name:
+                # sort key considers umlauts and such
+                entries.append((Locale.strxfrm(name), name, locale))
+        return entries
+
+    def _get_all_formats(self, translation_locale):
+        '''Returns None if a newer locale was requested meanwhile.'''
+        chunks = [sorted_locales[i::NAME_LOOKUP_WORKERS]
+                  for i in range(NAME_LOOKUP_WORKERS)]
+        lookup = partial(self._lookup_names, translation_locale)
+        entries = [entry for chunk in self.lookup_pool.map(lookup, chunks)
+                   for entry in chunk]
+        if self.is_superseded(translation_locale):
+            return None
+
+        formats = []
         # separate name set to prevent duplicates in list
         # see gnome-desktop issue https://gitlab.gnome.org/GNOME/gnome-shell/-/issues/3610
         names = set()
 
-        for locale in locales:
-            name = GnomeDesktop.get_country_from_locale(locale, translation_locale)
-            if name and not name in names:
+        for _, name, locale in sorted(entries):
+            if not name in names:
                 names.add(name)
-                self.formats.append(Format(name, locale))
-
-        # return sorted (considers umlauts and such)
-        self.formats.sort(key=lambda t: Locale.strxfrm(t.name))
+                formats.append(Format(name, locale))
+        return formats
 
     ### public methods ###
 
@@ -94,4 +157,5 @@ class FormatProvider(Preloadable):
         self.assert_preloaded()
         return self.formats
 
+
 format_provider = FormatProvider()
@@ -1,11 +1,39 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from locale import gettext as _
+
 from gi.repository import Gtk
 
 from .config import config
 from .installation_scripting import installation_scripting
 
 
+def _get_phase_names():
+    return {
+        # Translators: Installation phase
+        'partition': _('Partitioning disk'),
+        # Translators: Installation phase
+        'mkfs': _('Creating file systems'),
+        # Translators: Installation phase
+        'pull': _('Downloading system'),
+        # Translators: Installation phase
+        'bootc': _('Installing system'),
+        # Translators: Installation phase
+        'cleanup': _('Cleaning up'),
+        # Translators: Installation phase
+        'configure': _('Configuring system'),
+    }
+
+
+def _format_remaining(seconds):
+    if seconds < 60:
+        # Translators: Estimated remaining installation time
+        return _('Less than a minute left')
+    minutes = round(seconds / 60)
+    # Translators: Estimated remaining installation time, {} is a number
+    return _('About {} min left').format(minutes)
+
+
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/pages/install.ui')
 class InstallPage(Gtk.Box):
     __gtype_name__ = __qualname__
@@ -19,12 +47,28 @@ class InstallPage(Gtk.Box):
         # UI element states
         self.terminal_box.append(installation_scripting.terminal)
         self.stack.set_visible_child_name('spinner')
+        self.progress_bar = Gtk.ProgressBar(show_text=True, visible=False)
+        self.insert_child_after(self.progress_bar, self.stack)
         config.subscribe('installation_running', self._installation_done, delayed=True)
+        config.subscribe('installation_progress', self._progress_changed)
 
     def _installation_done(self, running):
         if not running:
             self.terminal_box.remove(installation_scripting.terminal)
 
+    def _progress_changed(self, progress):
+        fraction, phase, remaining = progress
+        if phase is None and fraction == 0:
+            # scripts did not report anything yet
+            return
+
+        self.progress_bar.set_visible(True)
+        self.progress_bar.set_fraction(fraction)
+        texts = [_get_phase_names().get(phase, phase)] if phase else []
+        if fraction < 1:
+            texts.append(_format_remaining(remaining))
+        self.progress_bar.set_text(' · '.join(texts))
+
     ### callbacks ###
 
     @Gtk.Template.Callback('terminal_button_toggled')
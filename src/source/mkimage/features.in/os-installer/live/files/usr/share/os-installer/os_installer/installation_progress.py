@@ -0,0 +1,250 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+Progress records sent by the installation scripts through a named pipe, whose
+path they get as OSI_PROGRESS_FIFO. One record per line:
+  phase <name>              a new phase started, the previous one ended
+  progress <done> <total>   progress within the current phase
+A phase also ends when the script of its step exits, time until the next
+step reports is not counted. Phase durations are appended to a timing log,
+the last successful installation's durations serve as expectation for
+progress and ETA.
+'''
+
+from datetime import datetime
+from time import monotonic
+import json
+import os
+
+from gi.repository import Gio, GLib
+
+from .config import config
+
+# order in which phases happen and expected durations in seconds,
+# used as long as no timing log exists
+default_phase_durations = {
+    'partition': 15,
+    'mkfs': 15,
+    'pull': 300,
+    'bootc': 240,
+    'cleanup': 5,
+    'configure': 30,
+}
+
+# progress within a phase is estimated from elapsed time, but never completed
+MAX_ESTIMATED_PHASE_PROGRESS = 0.95
+UPDATE_INTERVAL_SECONDS = 1
+
+FIFO_PATH = os.path.join(GLib.get_user_runtime_dir(), 'os-installer-progress')
+TIMING_LOG_PATH = os.path.join(
+    GLib.get_user_state_dir(), 'os-installer', 'timings.jsonl')
+
+
+def _get_build_id():
+    # distinguishes installation media
+    try:
+        with open('/etc/os-release') as file:
+            release = dict(line.rstrip('\n').split('=', 1)
+                           for line in file if '=' in line)
+    except Exception:
+        return 'unknown'
+    for key in ['IMAGE_VERSION', 'BUILD_ID', 'VERSION_ID']:
+        if key in release:
+            return release[key].strip('"')
+    return 'unknown'
+
+
+def _load_expected_durations():
+    durations = dict(default_phase_durations)
+    try:
+        with open(TIMING_LOG_PATH) as file:
+            entries = [json.loads(line) for line in file if line.strip()]
+    except FileNotFoundError:
+        return durations
+    except Exception as e:
+        print(f'Ignoring unreadable timing log: {e}')
+        return durations
+
+    successful = [entry for entry in entries if entry.get('result') == 'success']
+    if successful:
+        # phases of older installer versions are ignored
+        durations.update({phase: duration
+                          for phase, duration in successful[-1]['phases'].items()
+                          if phase in durations})
+    return durations
+
+
+def _remove_fifo():
+    # without the pipe scripts stop reporting, instead of waiting for a reader
+    try:
+        os.remove(FIFO_PATH)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f'Could not remove progress pipe: {e}')
+
+
+class InstallationProgress:
+    def __init__(self):
+        self.started = False
+        self.expected = None
+        # phase name to duration in seconds, in order of occurrence
+        self.durations = {}
+        self.phase = None
+        self.phase_start = None
+        self.phase_progress = None
+        self.start_time = None
+        # seconds between steps, e.g. spent on pages before configuring
+        self.waiting = 0
+        self.waiting_since = None
+        self.update_source = None
+        self.cancel = None
+
+    def _open_fifo(self):
+        if not os.path.exists(FIFO_PATH):
+            os.mkfifo(FIFO_PATH, 0o600)
+        try:
+            # also opened for writing, so reading never hits the end of file
+            fd = os.open(FIFO_PATH, os.O_RDWR | os.O_NONBLOCK)
+        except OSError:
+            _remove_fifo()
+            raise
+        stream = Gio.DataInputStream.new(Gio.UnixInputStream.new(fd, True))
+        self.cancel = Gio.Cancellable()
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, self.cancel, self._on_record)
+
+    def _end_phase(self):
+        if self.phase:
+            # pulling happens in the prefetch and in install.sh
+            duration = self.durations.get(self.phase, 0) + monotonic() - self.phase_start
+            self.durations[self.phase] = round(duration, 1)
+        self.phase = None
+
+    def _end_waiting(self):
+        if self.waiting_since is not None:
+            self.waiting += monotonic() - self.waiting_since
+        self.waiting_since = None
+
+    def _handle_record(self, record):
+        match record.split():
+            case ['phase', name]:
+                self._end_phase()
+                self._end_waiting()
+                self.phase = name
+                self.phase_start = monotonic()
+                self.phase_progress = None
+            case ['progress', done, total] if done.isdigit() and total.isdigit():
+                if int(total) > 0:
+                    self.phase_progress = min(int(done) / int(total), 1)
+            case _:
+                print(f'Ignoring unknown progress record "{record}"')
+                return
+        self._update()
+
+    def _get_phase_progress(self):
+        if self.phase_progress is not None:
+            return self.phase_progress
+        expected = self.expected.get(self.phase)
+        if not expected:
+            return 0
+        elapsed = monotonic() - self.phase_start
+        return min(elapsed / expected, MAX_ESTIMATED_PHASE_PROGRESS)
+
+    def _update(self):
+        done = sum(self.expected.get(phase, 0) for phase in self.durations
+                   if phase != self.phase)
+        remaining = sum(duration for phase, duration in self.expected.items()
+                        if not phase in self.durations and phase != self.phase)
+        if self.phase:
+            expected = self.expected.get(self.phase, 0)
+            phase_progress = self._get_phase_progress()
+            done += expected * phase_progress
+            remaining += expected * (1 - phase_progress)
+
+        total = done + remaining
+        fraction = done / total if total else 0
+        config.set('installation_progress', (fraction, self.phase, round(remaining)))
+        return GLib.SOURCE_CONTINUE
+
+    def _write_timing_log(self, result):
+        entry = {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'build': _get_build_id(),
+            'image': config.get('container_image'),
+            'result': result,
+            'phases': self.durations,
+            'total': round(monotonic() - self.start_time - self.waiting, 1),
+        }
+        try:
+            os.makedirs(os.path.dirname(TIMING_LOG_PATH), exist_ok=True)
+            with open(TIMING_LOG_PATH, 'a') as file:
+                file.write(json.dumps(entry) + '\n')
+        except Exception as e:
+            print(f'Could not write timing log: {e}')
+
+        for phase, duration in self.durations.items():
+            print(f'Phase {phase} took {duration}s')
+
+    ### callbacks ###
+
+    def _on_record(self, stream, result):
+        try:
+            line, _length = stream.read_line_finish_utf8(result)
+        except GLib.Error as e:
+            if not e.matches(Gio.io_error_quark(), Gio.IOErrorEnum.CANCELLED):
+                print(f'Could not read progress: {e.message}')
+            stream.close()
+            return
+        if line is not None:
+            self._handle_record(line)
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, self.cancel, self._on_record)
+
+    ### public methods ###
+
+    def get_fifo_path(self):
+        return FIFO_PATH
+
+    def start(self):
+        '''Starts listening for progress records, once.'''
+        if self.started:
+            return
+        self.started = True
+        self.expected = _load_expected_durations()
+        self.start_time = monotonic()
+        try:
+            self._open_fifo()
+        except OSError as e:
+            print(f'Could not set up progress reporting: {e}')
+        self.update_source = GLib.timeout_add_seconds(
+            UPDATE_INTERVAL_SECONDS, self._update)
+
+    def finish(self, succeeded):
+        '''Ends the last phase and logs durations of all phases.'''
+        if not self.started or self.update_source is None:
+            return
+        GLib.source_remove(self.update_source)
+        self.update_source = None
+        self._end_phase()
+        self._end_waiting()
+        self.stop()
+        if succeeded:
+            config.set('installation_progress', (1, None, 0))
+        self._write_timing_log('success' if succeeded else 'failed')
+
+    def step_finished(self):
+        '''Ends the open phase, time until the next one is not counted.'''
+        if self.update_source is None:
+            return
+        self._end_phase()
+        self.waiting_since = monotonic()
+
+    def stop(self):
+        '''Stops listening for progress records, e.g. when quitting.'''
+        if self.cancel:
+            self.cancel.cancel()
+            self.cancel = None
+        if self.started:
+            _remove_fifo()
+
+
+installation_progress = InstallationProgress()
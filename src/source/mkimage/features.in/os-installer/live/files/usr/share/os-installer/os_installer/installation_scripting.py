@@ -3,20 +3,44 @@
 from locale import gettext as _
 from threading import Lock
 import os
+import re
+import signal
 
 from gi.repository import Gio, GLib, Vte
 
 from .config import config
 from .envvar_creator import create_envs
+from .installation_progress import installation_progress
 from .installation_step import InstallationStep
 
 
+scripts_path = '/etc/os-installer/scripts'
+
+# step graph: steps that need to be finished before a step can start
+step_dependencies = {
+    InstallationStep.prepare: [],
+    InstallationStep.install: [InstallationStep.prepare],
+    InstallationStep.configure: [InstallationStep.install],
+}
+
+# sub-steps only read from the system or download, so they are safe to start
+# as soon as the dependencies of their step may run and run concurrently
+# to other steps; a step only starts once its sub-steps finished
+early_sub_steps = {
+    InstallationStep.install: ['install-check', 'install-fetch'],
+}
+
+# steps write key=value lines to OSI_STEP_OUTPUT, later steps get OSI_OUT_<key>
+output_key_pattern = re.compile(r'[A-Z][A-Z0-9_]*')
+
+
 class InstallationScripting():
     '''
     Handles all calls to scripts for installation. The installation process consists of 3 steps:
     * Preparation. Used e.g. for updating mirrors.
     * Installation. Installs an OS onto a disk.
     * Configuration. Configures an OS according to user's choices.
+    Steps run in the terminal one at a time, sub-steps in the background.
     '''
 
     def __init__(self):
@@ -26,7 +50,13 @@ class InstallationScripting():
         self.lock = Lock()
         self.ready_step = InstallationStep.none
         self.running_step = InstallationStep.none
-        self.finished_step = InstallationStep.none
+        self.finished_steps = set()
+        # sub-step name to whether it succeeded, None while running
+        self.sub_steps = {}
+        self.sub_step_processes = {}
+        self.failed = False
+        # outputs of finished steps
+        self.step_outputs = {}
 
     def _setup_terminal(self):
         terminal = Vte.Terminal()
@@ -38,63 +68,220 @@ class InstallationScripting():
         return terminal
 
     def _fail_installation(self):
-        config.set('installation_running', False)
-        config.set('displayed-page', 'failed')
-        # Translators: Notification text
-        config.set('send_notification', _("Finished Installation"))
+        installation_progress.finish(succeeded=False)
+        with config.batch():
+            config.set('installation_running', False)
+            config.set('displayed-page', 'failed')
+            # Translators: Notification text
+            config.set('send_notification', _("Finished Installation"))
+
+    def _is_ready(self, step):
+        return step.value <= self.ready_step.value
+
+    def _get_next_step(self):
+        for step, dependencies in step_dependencies.items():
+            if (not step in self.finished_steps and self._is_ready(step) and
+                    all(dependency in self.finished_steps for dependency in dependencies)):
+                return step
+        return None
+
+    def _start_sub_steps(self):
+        for step, sub_steps in early_sub_steps.items():
+            if not all(self._is_ready(dependency) for dependency in step_dependencies[step]):
+                continue
+            for sub_step in sub_steps:
+                if not sub_step in self.sub_steps:
+                    self._start_sub_step(sub_step)
+
+    def _start_sub_step(self, sub_step):
+        file_name = f'{scripts_path}/{sub_step}.sh'
+        if not os.path.exists(file_name):
+            print(f'No script for sub-step {sub_step} exists.')
+            self.sub_steps[sub_step] = True
+            return
+
+        print(f'Starting sub-step "{sub_step}"...')
+        launcher = Gio.SubprocessLauncher.new(
+            Gio.SubprocessFlags.STDOUT_PIPE | Gio.SubprocessFlags.STDERR_MERGE)
+        # early sub-steps must not depend on choices made later on
+        for env in create_envs(InstallationStep.prepare)[:-1]:
+            variable, value = env.split('=', 1)
+            launcher.setenv(variable, value, True)
+        try:
+            process = launcher.spawnv(['sh', file_name])
+        except GLib.Error as e:
+            print(f'Could not start sub-step {sub_step}: {e.message}')
+            self.sub_steps[sub_step] = False
+            return
+
+        self.sub_steps[sub_step] = None
+        self.sub_step_processes[sub_step] = process
+        output = Gio.DataInputStream.new(process.get_stdout_pipe())
+        output.read_line_async(GLib.PRIORITY_DEFAULT, self.cancel,
+                               self._on_sub_step_output, sub_step)
+        process.wait_check_async(self.cancel, self._on_sub_step_exited, sub_step)
+
+    def _sub_steps_state(self, step):
+        '''Returns False if a sub-step failed, None while some are running.'''
+        states = [self.sub_steps.get(sub_step)
+                  for sub_step in early_sub_steps.get(step, [])]
+        if False in states:
+            return False
+        if None in states:
+            return None
+        return True
 
     def _try_start_next_script(self):
+        if self.failed:
+            return
+
+        self._start_sub_steps()
+
         if self.running_step != InstallationStep.none:
             return
 
-        if self.finished_step.value >= self.ready_step.value:
+        if (next_step := self._get_next_step()) is None:
             return
 
-        next_step = InstallationStep(self.finished_step.value + 1)
+        match self._sub_steps_state(next_step):
+            case None:
+                # started once sub-steps finished, whose progress is shown
+                self._start_installation(next_step)
+                return
+            case False if not config.get('demo_mode'):
+                print(f'Sub-step of step "{next_step.name}" failed')
+                self.failed = True
+                # might be called during navigation, fail afterwards
+                config.defer(self._fail_installation)
+                return
+
         print(f'Starting step "{next_step.name}"...')
-        if next_step != InstallationStep.prepare:
-            config.set('installation_running', True)
+        self._start_installation(next_step)
 
-        envs = create_envs(next_step)
+        envs = self._create_step_envs(next_step)
 
         # start script
-        file_name = f'/etc/os-installer/scripts/{next_step.name}.sh'
+        file_name = f'{scripts_path}/{next_step.name}.sh'
         if os.path.exists(file_name):
-            started_script, _ = self.terminal.spawn_sync(
-                Vte.PtyFlags.DEFAULT, '/', ['sh', file_name],
-                envs, GLib.SpawnFlags.DEFAULT, None, None, self.cancel)
-            if not started_script:
-                print(f'Could not start {self.finished_step.name} script! '
-                      'Ignoring.')
-                self._try_start_next_script()
-            else:
-                self.running_step = next_step
+            # marked running right away, spawning finishes in the main loop
+            self.running_step = next_step
+            self.terminal.spawn_async(
+                Vte.PtyFlags.DEFAULT, '/', ['sh', file_name], envs,
+                GLib.SpawnFlags.DEFAULT, None, None, -1, self.cancel,
+                self._on_spawned, next_step)
         else:
             print(f'No script for step {next_step.name} exists.')
-            self.finished_step = next_step
+            self.finished_steps.add(next_step)
             self._try_start_next_script()
 
+    def _start_installation(self, step):
+        if step != InstallationStep.prepare:
+            installation_progress.start()
+            config.set('installation_running', True)
+
+    def _get_output_path(self, step):
+        return os.path.join(GLib.get_user_runtime_dir(),
+                            f'os-installer-{step.name}-output')
+
+    def _create_step_envs(self, step):
+        output_path = self._get_output_path(step)
+        try:
+            os.remove(output_path)
+        except FileNotFoundError:
+            pass
+
+        envs = create_envs(step)[:-1]
+        envs += [f'OSI_OUT_{key}={value}' for key, value in self.step_outputs.items()]
+        return envs + [f'OSI_STEP_OUTPUT={output_path}', None]
+
+    def _read_step_outputs(self, step):
+        try:
+            with open(self._get_output_path(step)) as file:
+                lines = file.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        for line in lines:
+            key, separator, value = line.partition('=')
+            if not separator or not output_key_pattern.fullmatch(key):
+                print(f'Ignoring malformed output of step "{step.name}": {line}')
+                continue
+            self.step_outputs[key] = value
+
+    def _finish_step(self, finished_step, failed):
+        # navigate without holding the lock, page changes can start steps
+        if failed:
+            print(f'Failure during step "{finished_step.name}"')
+            self._fail_installation()
+        else:
+            print(f'Finished step "{finished_step.name}".')
+            installation_progress.finish(succeeded=True)
+            config.set('installation_running', False)
+            # Translators: Notification text
+            config.set('send_notification', _("Finished Installation"))
+            config.set_next_page(None)
+
     ### callbacks ###
 
+    def _on_spawned(self, terminal, pid, error, step):
+        if pid != -1:
+            return
+
+        message = error.message if error else 'unknown error'
+        print(f'Could not start {step.name} script! Ignoring. ({message})')
+        with self.lock:
+            self.running_step = InstallationStep.none
+            self.finished_steps.add(step)
+            all_finished = len(self.finished_steps) == len(step_dependencies)
+            if not all_finished:
+                self._try_start_next_script()
+        if all_finished:
+            self._finish_step(step, failed=False)
+
     def _on_child_exited(self, terminal, status):
         with self.lock:
-            self.finished_step = self.running_step
+            finished_step = self.running_step
             self.running_step = InstallationStep.none
+            self.finished_steps.add(finished_step)
+            # later steps might wait for the user
+            installation_progress.step_finished()
+            failed = not status == 0 and not config.get('demo_mode')
+            all_finished = len(self.finished_steps) == len(step_dependencies)
+            if not failed:
+                self._read_step_outputs(finished_step)
 
-            if not status == 0 and not config.get('demo_mode'):
-                print(f'Failure during step "{self.finished_step.name}"')
-                self._fail_installation()
+            if not failed and not all_finished:
+                print(f'Finished step "{finished_step.name}".')
+                self._try_start_next_script()
                 return
+            self.failed = failed
 
-            print(f'Finished step "{self.finished_step.name}".')
+        self._finish_step(finished_step, failed)
 
-            if self.finished_step is InstallationStep.configure:
-                config.set('installation_running', False)
-                # Translators: Notification text
-                config.set('send_notification', _("Finished Installation"))
-                config.set_next_page(None)
-            else:
-                self._try_start_next_script()
+    def _on_sub_step_output(self, stream, result, sub_step):
+        try:
+            line, _length = stream.read_line_finish_utf8(result)
+        except GLib.Error:
+            return
+        if line is None:
+            return
+        self.terminal.feed(f'[{sub_step}] {line}\r\n'.encode())
+        stream.read_line_async(GLib.PRIORITY_DEFAULT, self.cancel,
+                               self._on_sub_step_output, sub_step)
+
+    def _on_sub_step_exited(self, process, result, sub_step):
+        try:
+            succeeded = process.wait_check_finish(result)
+        except GLib.Error as e:
+            print(f'Sub-step "{sub_step}" failed: {e.message}')
+            succeeded = False
+        else:
+            print(f'Finished sub-step "{sub_step}".')
+
+        with self.lock:
+            self.sub_steps[sub_step] = succeeded
+            del self.sub_step_processes[sub_step]
+            self._try_start_next_script()
 
     def _set_ok_to_start_step(self, step: InstallationStep):
         with self.lock:
@@ -104,6 +291,12 @@ class InstallationScripting():
 
     ### public methods ###
 
+    def cancel_sub_steps(self):
+        '''Asks running sub-steps to stop, e.g. downloads when quitting.'''
+        with self.lock:
+            for process in self.sub_step_processes.values():
+                process.send_signal(signal.SIGTERM)
+
     def can_run_configure(self):
         self._set_ok_to_start_step(InstallationStep.configure)
 
@@ -1,6 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from threading import Lock, Thread
+from threading import Lock
 
 from gi.repository import Gtk
 
@@ -36,7 +36,8 @@ class InternetPage(Gtk.Stack):
                 start_system_timesync()
                 if not self.has_advanced:
                     self.has_advanced = True
-                    Thread(target=config.set_next_page, args=[self]).start()
+                    # might be called during navigation, advance afterwards
+                    config.defer(config.set_next_page, self)
             else:
                 self.set_visible_child_name('not-connected')
                 config.set('internet_page_image',
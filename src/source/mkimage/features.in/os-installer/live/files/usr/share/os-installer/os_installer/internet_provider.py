@@ -1,30 +1,107 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from threading import Thread
-from time import sleep
+from threading import Event, Lock, Thread
 from urllib.request import urlopen
 
+from gi.repository import Gio
+
 from .config import config
 from .preloadable import Preloadable
 
+# seconds, a probe is only a confirmation of what the network monitor reports
+PROBE_TIMEOUT = 5
+PROBE_MIN_DELAY = 1
+PROBE_MAX_DELAY = 30
+
 
 class InternetProvider(Preloadable):
+    '''
+    Follows the connectivity reported by Gio.NetworkMonitor. Whenever the
+    monitor reports a usable network, the checker url is probed with backoff
+    until it can be reached. Once connected, nothing is probed until the
+    network changes again.
+    '''
+
     def __init__(self):
-        Preloadable.__init__(self, self._run_connection_checker)
+        Preloadable.__init__(self, self._start_connection_monitor,
+                             needed_by=['internet'])
+        self.probe_lock = Lock()
+        self.probe_thread = None
+        self.network_changed = Event()
 
-    def _run_connection_checker(self):
-        Thread(target=self._check_connection, daemon=True).start()
+    def _start_connection_monitor(self):
+        self.monitor = Gio.NetworkMonitor.get_default()
+        self.handler = self.monitor.connect(
+            'network-changed', self._network_changed)
+        config.subscribe('installation_running',
+                         self._installation_running, delayed=True)
+        self._network_changed(self.monitor, self.monitor.get_network_available())
 
-    def _check_connection(self):
+    def _has_usable_network(self):
+        return (self.monitor.get_network_available() and
+                self.monitor.get_connectivity() != Gio.NetworkConnectivity.LOCAL)
+
+    def _probe(self):
         url = config.get('internet_checker_url')
+        try:
+            urlopen(url, timeout=PROBE_TIMEOUT)
+            return True
+        except:
+            return False
 
+    def _probe_until_connected(self):
+        delay = PROBE_MIN_DELAY
         while not config.get('installation_running'):
-            try:
-                urlopen(url, timeout=50)
+            self.network_changed.clear()
+            if not self._has_usable_network():
+                break
+            # subscribers are only notified if the state changes
+            if self._probe():
                 config.set('internet_connection', True)
-            except:
-                config.set('internet_connection', False)
-            sleep(1)
+                break
+            config.set('internet_connection', False)
+            # retry sooner if the network changes meanwhile
+            if self.network_changed.wait(delay):
+                delay = PROBE_MIN_DELAY
+            else:
+                delay = min(delay * 2, PROBE_MAX_DELAY)
+
+        with self.probe_lock:
+            self.probe_thread = None
+            # network changed while finishing up
+            if self.network_changed.is_set() and not config.get('installation_running'):
+                self.network_changed.clear()
+                self.probe_thread = Thread(
+                    target=self._probe_until_connected, daemon=True)
+                self.probe_thread.start()
+
+    def _start_probing(self):
+        with self.probe_lock:
+            if self.probe_thread:
+                self.network_changed.set()
+                return
+            self.probe_thread = Thread(
+                target=self._probe_until_connected, daemon=True)
+            self.probe_thread.start()
+
+    ### callbacks ###
+
+    def _installation_running(self, running):
+        if running and self.handler:
+            self.monitor.disconnect(self.handler)
+            self.handler = None
+            self.network_changed.set()
+
+    def _network_changed(self, monitor, network_available):
+        if config.get('installation_running'):
+            return
+
+        if self._has_usable_network():
+            # connectivity might have changed, confirm it
+            self._start_probing()
+        else:
+            config.set('internet_connection', False)
+            self.network_changed.set()
 
 
 internet_provider = InternetProvider()
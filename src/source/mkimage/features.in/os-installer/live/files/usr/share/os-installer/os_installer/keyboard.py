@@ -3,10 +3,10 @@
 from gi.repository import Gio, Gtk
 
 from .config import config
-from .keyboard_layout_provider import get_default_layout, get_layouts_for
+from .keyboard_layout_provider import keyboard_layout_provider
 from .language_provider import language_provider
 from .system_calls import set_system_keyboard_layout
-from .widgets import reset_model, ProgressRow
+from .widgets import reset_model, RecyclingList
 
 
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/pages/keyboard_language.ui')
@@ -19,17 +19,22 @@ class KeyboardLanguagePage(Gtk.Box):
     def __init__(self, **kwargs):
         Gtk.Box.__init__(self, **kwargs)
 
+        self.list = RecyclingList(self.list, self.model, self._language_selected)
+        language_provider.when_preloaded(self._fill_list)
+
+    def _fill_list(self):
         self.model.splice(0, 0, language_provider.get_all_languages())
-        self.list.bind_model(self.model, lambda o: ProgressRow(o.name, o))
 
     ### callbacks ###
 
-    @Gtk.Template.Callback('language_row_activated')
-    def _language_row_activated(self, list_box, row):
-        info = row.info
+    def _language_selected(self, info):
         config.set('keyboard_language', (info.language_code, info.name))
         config.set_next_page(self)
 
+    @Gtk.Template.Callback('language_row_activated')
+    def _language_row_activated(self, list_box, row):
+        '''Connected by the precompiled template, whose list box never gets rows.'''
+
 
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/pages/keyboard_layout.ui')
 class KeyboardLayoutPage(Gtk.Box):
@@ -42,8 +47,8 @@ class KeyboardLayoutPage(Gtk.Box):
     def __init__(self, **kwargs):
         Gtk.Box.__init__(self, **kwargs)
 
-        self.layout_list.bind_model(
-            self.model, lambda o: ProgressRow(o.name, o))
+        self.layout_list = RecyclingList(
+            self.layout_list, self.model, self._layout_selected)
 
         config.subscribe('keyboard_language', self._update_keyboard_language)
 
@@ -51,15 +56,28 @@ class KeyboardLayoutPage(Gtk.Box):
 
     def _update_keyboard_language(self, language):
         code, name = language
-        reset_model(self.model, get_layouts_for(code, name))
         self.language_row.set_subtitle(name)
+        keyboard_layout_provider.when_preloaded(
+            lambda: self._show_layouts(code, name))
 
-    @Gtk.Template.Callback('layout_row_activated')
-    def _layout_row_activated(self, list_box, row):
+    def _show_layouts(self, code, name):
+        # language might have changed again meanwhile
+        if config.get('keyboard_language') == (code, name):
+            reset_model(self.model, keyboard_layout_provider.get_layouts_for(code, name))
+
+    def retranslated(self, retranslator):
+        # layout names are reloaded in the new language
+        self._update_keyboard_language(config.get('keyboard_language'))
+
+    def _layout_selected(self, info):
         # use selected keyboard layout
-        set_system_keyboard_layout(keyboard_info=row.info)
+        set_system_keyboard_layout(keyboard_info=info)
         config.set_next_page(self)
 
+    @Gtk.Template.Callback('layout_row_activated')
+    def _layout_row_activated(self, list_box, row):
+        '''Connected by the precompiled template, whose list box never gets rows.'''
+
     @Gtk.Template.Callback('show_language_selection')
     def _show_language_selection(self, row):
         config.set('displayed-page', 'keyboard-language')
@@ -77,11 +95,17 @@ class KeyboardOverviewPage(Gtk.Box):
         if not config.has('keyboard_layout'):
             language_code, language = config.get('language')
             config.set('keyboard_language', (language_code, language))
-            keyboard = get_default_layout(language_code)
-            set_system_keyboard_layout(keyboard_info=keyboard)
+            keyboard_layout_provider.when_preloaded(
+                lambda: self._set_default_layout(language_code))
 
         config.subscribe('keyboard_layout', self._update_primary_layout)
 
+    def _set_default_layout(self, language_code):
+        # user might have chosen a layout meanwhile
+        if not config.has('keyboard_layout'):
+            keyboard = keyboard_layout_provider.get_default_layout(language_code)
+            set_system_keyboard_layout(keyboard_info=keyboard)
+
     ### callbacks ###
 
     def _update_primary_layout(self, keyboard_layout):
@@ -3,6 +3,10 @@
 from gi.repository import GObject
 from gi.repository.GnomeDesktop import XkbInfo
 
+from .config import config
+from .language_provider import language_provider
+from .preloadable import Preloadable
+
 # generated via language_codes_to_x_generator.py
 language_to_default_keyboard = {
     'ab': 'ru', 'aa': 'us', 'af': 'us+intl', 'ak': 'us+altgr-intl', 'sq': 'al', 'am': 'et', 'ar': 'ara', 'an': 'es',
@@ -37,8 +41,6 @@ fallback_codes = {
     'oc': 'fr'
 }
 
-xkb_info = XkbInfo()
-
 
 class KeyboardInfo(GObject.Object):
     __gtype_name__ = __qualname__
@@ -61,26 +63,6 @@ def _short_code(code):
     return code.split('_')[0]
 
 
-def _get_existing_layouts(language_code):
-    xkb_info = XkbInfo()
-    layouts = xkb_info.get_layouts_for_language(language_code)
-    if len(layouts) > 0:
-        return layouts
-
-    if not (short_code := _short_code(language_code)) == language_code:
-        layouts = xkb_info.get_layouts_for_language(short_code)
-        if len(layouts) > 0:
-            return layouts
-
-    if fallback_code := _fallback_code(language_code):
-        layouts = xkb_info.get_layouts_for_language(fallback_code)
-        return layouts
-    else:
-        print(f'Language {language_code} has no keyboard layouts! '
-              'Please report this.')
-        return ['us']
-
-
 def _get_default_layout_code(language_code):
     if language_code in language_to_default_keyboard:
         return language_to_default_keyboard[language_code]
@@ -92,23 +74,97 @@ def _get_default_layout_code(language_code):
         return 'us'
 
 
-def get_default_layout(language_code):
-    layout_code = _get_default_layout_code(language_code)
-    name = xkb_info.get_layout_info(layout_code).display_name
-    return KeyboardInfo(name, layout_code)
+class KeyboardLayoutProvider(Preloadable):
+    def __init__(self):
+        Preloadable.__init__(self, self._load_layouts,
+                             needed_by=['keyboard-overview', 'keyboard-layout'],
+                             depends_on=[language_provider])
+        self.sorted_layouts = {}
+
+    def _load_layouts(self):
+        self.xkb_info = XkbInfo()
+
+        self.layout_names = {}
+        for layout in self.xkb_info.get_all_layouts():
+            self.layout_names[layout] = self.xkb_info.get_layout_info(
+                layout).display_name
+
+        # index layouts of all languages that can be chosen
+        self.language_layouts = {}
+        for language_info in language_provider.get_all_languages():
+            self._get_existing_layouts(language_info.language_code)
+
+    def _reload_layout_names(self):
+        self.xkb_info = XkbInfo()
+        self.layout_names = {}
+        self.sorted_layouts = {}
+
+        if config.has('keyboard_layout'):
+            layout, _ = config.get('keyboard_layout')
+            config.set('keyboard_layout', (layout, self._get_layout_name(layout)))
+
+    def _get_existing_layouts(self, language_code):
+        if language_code in self.language_layouts:
+            return self.language_layouts[language_code]
+
+        layouts = self._find_existing_layouts(language_code)
+        self.language_layouts[language_code] = layouts
+        return layouts
+
+    def _find_existing_layouts(self, language_code):
+        layouts = self.xkb_info.get_layouts_for_language(language_code)
+        if len(layouts) > 0:
+            return layouts
+
+        if not (short_code := _short_code(language_code)) == language_code:
+            layouts = self.xkb_info.get_layouts_for_language(short_code)
+            if len(layouts) > 0:
+                return layouts
+
+        if fallback_code := _fallback_code(language_code):
+            layouts = self.xkb_info.get_layouts_for_language(fallback_code)
+            return layouts
+        else:
+            print(f'Language {language_code} has no keyboard layouts! '
+                  'Please report this.')
+            return ['us']
+
+    def _get_layout_name(self, layout):
+        if not layout in self.layout_names:
+            self.layout_names[layout] = self.xkb_info.get_layout_info(
+                layout).display_name
+        return self.layout_names[layout]
+
+    ### public methods ###
+
+    def get_default_layout(self, language_code):
+        self.assert_preloaded()
+
+        layout_code = _get_default_layout_code(language_code)
+        return KeyboardInfo(self._get_layout_name(layout_code), layout_code)
+
+    def get_layouts_for(self, language_code, language):
+        self.assert_preloaded()
+
+        if (language_code, language) in self.sorted_layouts:
+            return self.sorted_layouts[(language_code, language)]
+
+        named_layouts = []
+        for layout in self._get_existing_layouts(language_code):
+            named_layouts.append(KeyboardInfo(self._get_layout_name(layout), layout))
 
+        default_layout = _get_default_layout_code(language_code)
+        # Sort the layouts, prefer those starting with language name or matching language short hand. Then by name.
+        sorted_layouts = sorted(named_layouts, key=lambda o:
+                                (not o.layout == default_layout,
+                                 not o.name.startswith(language),
+                                 o.name))
+        self.sorted_layouts[(language_code, language)] = sorted_layouts
+        return sorted_layouts
 
-def get_layouts_for(language_code, language):
-    layouts = _get_existing_layouts(language_code)
+    def retranslate(self):
+        '''Reloads the layout names, they are shown in the app language.'''
+        self.when_preloaded(self._reload_layout_names)
 
-    named_layouts = []
-    for layout in layouts:
-        name = xkb_info.get_layout_info(layout).display_name
-        named_layouts.append(KeyboardInfo(name, layout))
 
-    default_layout = _get_default_layout_code(language_code)
-    # Sort the layouts, prefer those starting with language name or matching language short hand. Then by name.
-    return sorted(named_layouts, key=lambda o:
-                  (not o.layout == default_layout,
-                   not o.name.startswith(language),
-                   o.name))
+keyboard_layout_provider = KeyboardLayoutProvider()
@@ -5,7 +5,7 @@ from gi.repository import Gtk
 from .config import config
 from .language_provider import language_provider
 from .system_calls import set_system_language
-from .widgets import ProgressRow
+from .widgets import ProgressRow, RecyclingList
 
 
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/pages/language.ui')
@@ -21,6 +21,9 @@ class LanguagePage(Gtk.Box):
     def __init__(self, **kwargs):
         Gtk.Box.__init__(self, **kwargs)
 
+        language_provider.when_preloaded(self._fill_lists)
+
+    def _fill_lists(self):
         if suggested_languages := language_provider.get_suggested_languages():
             self.suggested_model.splice(0, 0, suggested_languages)
             self.suggested_list.bind_model(
@@ -30,15 +33,20 @@ class LanguagePage(Gtk.Box):
 
         if other_languages := language_provider.get_other_languages():
             self.other_model.splice(0, 0, other_languages)
-            self.other_list.bind_model(
-                self.other_model, lambda o: ProgressRow(o.name, o))
+            # only few languages are suggested, others are many
+            self.other_list = RecyclingList(
+                self.other_list, self.other_model, self._language_selected)
         else:
             self.other_list.set_visible(False)
 
     ### callbacks ###
 
+    def _language_selected(self, info):
+        with config.batch():
+            if config.set('language', (info.language_code, info.name)):
+                set_system_language(info)
+        config.set_next_page(self)
+
     @Gtk.Template.Callback('language_row_activated')
     def _language_row_activated(self, list_box, row):
-        if config.set('language', (row.info.language_code, row.info.name)):
-            set_system_language(row.info)
-        config.set_next_page(self)
+        self._language_selected(row.info)
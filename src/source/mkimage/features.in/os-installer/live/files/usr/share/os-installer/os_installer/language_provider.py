@@ -64,7 +64,8 @@ class LanguageInfo(GObject.Object):
 
 class LanguageProvider(Preloadable):
     def __init__(self):
-        Preloadable.__init__(self, self._get_languages)
+        Preloadable.__init__(self, self._get_languages,
+                             needed_by=['language', 'keyboard-language'])
 
     def _get_default_locale(self, language):
         if language in language_to_default_locale:
@@ -93,25 +94,33 @@ class LanguageProvider(Preloadable):
         elif lang := GnomeDesktop.get_language_from_code(lang_code.split('_')[0], localization):
             return f'{lang} ({lang_code})'
 
-    def _get_languages(self):
-        localedir = config.get('localedir')
-        translations = self._get_existing_translations(localedir)
-
-        self.all_languages = []
+    def _get_all_languages(self, translations):
+        all_languages = []
         unavailable_languages = []
         for language_code in translations:
             locale = self._get_default_locale(language_code)
 
             if name := self._get_language_name_localized(locale, locale, language_code):
                 language_info = LanguageInfo(name, language_code, locale)
-                self.all_languages.append(language_info)
+                all_languages.append(language_info)
             else:
                 unavailable_languages.append(language_code)
 
         if unavailable_languages:
             print('The following locales are not available on the current system: ',
                   sorted(unavailable_languages))
-        self.all_languages.sort(key=lambda k: k.name)
+        all_languages.sort(key=lambda k: k.name)
+        return all_languages
+
+    def _get_languages(self):
+        localedir = config.get('localedir')
+        translations = self._get_existing_translations(localedir)
+
+        self.all_languages = self.load_cached(
+            'languages', sorted(translations),
+            lambda: self._get_all_languages(translations),
+            lambda info: (info.name, info.language_code, info.locale),
+            lambda entry: LanguageInfo(*entry), libraries=['libgnome-desktop'])
 
         self.suggested = []
         self.other = []
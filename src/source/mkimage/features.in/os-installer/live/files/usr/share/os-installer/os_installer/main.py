@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+import signal
 import sys
 
 import gi
@@ -15,7 +16,10 @@ gi.require_version('Vte', '3.91')          # noqa: E402
 from gi.repository import Adw, Gio, GLib, Gtk
 
 # local, import order is important
+from .startup_profiler import startup_profiler
 from .config import config
+from .installation_progress import installation_progress
+from .installation_scripting import installation_scripting
 from .preload_manager import preload_manager
 from .window import OsInstallerWindow
 
@@ -37,6 +41,10 @@ class Application(Adw.Application):
                              GLib.OptionArg.NONE, "Run in demo mode. Does not alter the system", None)
         self.add_main_option('test-mode', b't', GLib.OptionFlags.NONE,
                              GLib.OptionArg.NONE, "Run in testing mode. Does not alter the system, but runs scripts.", None)
+        self.add_main_option('profile-startup', ord('p'), GLib.OptionFlags.NONE,
+                             GLib.OptionArg.STRING, "Write a startup timeline as JSON to the given file.", 'FILE')
+        self.add_main_option('startup-budget', ord('b'), GLib.OptionFlags.NONE,
+                             GLib.OptionArg.DOUBLE, "Quit after the first frame, fail if it took longer than the given seconds.", 'SECONDS')
 
         config.set('version', version)
         config.set('send_notification', None)
@@ -57,7 +65,9 @@ class Application(Adw.Application):
         else:
             self.window = OsInstallerWindow(application=self)
             self._setup_icons()
+            startup_profiler.mark('window.present()')
             self.window.present()
+            self.window.add_tick_callback(self._on_first_frame)
 
     def do_command_line(self, command_line):
         options = command_line.get_options_dict()
@@ -71,6 +81,11 @@ class Application(Adw.Application):
         elif 'test-mode' in options:
             config.set('test_mode', True)
 
+        if 'profile-startup' in options or 'startup-budget' in options:
+            startup_profiler.start()
+            startup_profiler.configure(options.get('profile-startup'),
+                                       options.get('startup-budget'))
+
         self.activate()
         return 0
 
@@ -79,12 +94,31 @@ class Application(Adw.Application):
         self.set_resource_base_path('/com/github/p3732/os-installer')
         Adw.Application.do_startup(self)
 
+        # quit regularly when terminated, so shutdown still happens
+        for signal_number in [signal.SIGINT, signal.SIGTERM]:
+            GLib.unix_signal_add(GLib.PRIORITY_DEFAULT, signal_number, self._on_signal)
+
+    def do_shutdown(self):
+        # reached however the application quits, e.g. via the window
+        installation_scripting.cancel_sub_steps()
+        installation_progress.stop()
+        Adw.Application.do_shutdown(self)
+
     ### callbacks ###
 
     def _on_quit(self, action, param=None):
         self.window.close()
         return True
 
+    def _on_first_frame(self, widget, frame_clock):
+        if startup_profiler.first_frame_drawn():
+            self.quit()
+        return GLib.SOURCE_REMOVE
+
+    def _on_signal(self):
+        self.quit()
+        return GLib.SOURCE_CONTINUE
+
     def _send_notification(self, title):
         if not title:
             return
@@ -95,4 +129,7 @@ class Application(Adw.Application):
 
 def main(version):
     app = Application(version)
-    return app.run(sys.argv)
+    status = app.run(sys.argv)
+    if startup_profiler.over_budget():
+        return 1
+    return status
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from importlib import import_module
 from locale import gettext as _
 from pathlib import Path
 
@@ -7,25 +8,6 @@ from gi.repository import Adw, Gdk, Gtk
 
 from .config import config
 
-from .choices import FeaturePage, SoftwarePage
-from .confirm import ConfirmPage
-from .desktop import DesktopPage
-from .disk import DiskPage
-from .done import DonePage
-from .encrypt import EncryptPage
-from .failed import FailedPage
-from .filter import FormatPage, TimezonePage
-from .install import InstallPage
-from .internet import InternetPage
-from .keyboard import KeyboardLanguagePage, KeyboardLayoutPage, KeyboardOverviewPage
-from .language import LanguagePage
-from .locale import LocalePage
-from .partition import PartitionPage
-from .restart import RestartPage
-from .summary import SummaryPage
-from .user import UserPage
-from .welcome import WelcomePage
-
 page_name_to_page_title = {
     # Translators: Page title
     'confirm':              _('Confirmation'),
@@ -98,33 +80,58 @@ page_name_to_image = {
 
 special_image_pages = {'internet', 'welcome'}
 
+# pages are only imported when first shown, (module, attribute)
 page_name_to_type = {
-    'confirm':              ConfirmPage,
-    'desktop':              DesktopPage,
-    'disk':                 DiskPage,
-    'done':                 DonePage,
-    'encrypt':              EncryptPage,
-    'failed':               FailedPage,
-    'feature':              FeaturePage,
-    'format':               FormatPage,
-    'install':              InstallPage,
-    'internet':             InternetPage,
-    'keyboard-language':    KeyboardLanguagePage,
-    'keyboard-layout':      KeyboardLayoutPage,
-    'keyboard-overview':    KeyboardOverviewPage,
-    'language':             LanguagePage,
-    'locale':               LocalePage,
-    'partition':            PartitionPage,
-    'restart':              RestartPage,
-    'software':             SoftwarePage,
-    'summary':              SummaryPage,
-    'timezone':             TimezonePage,
-    'user':                 UserPage,
-    'welcome':              WelcomePage,
+    'confirm':              ('.confirm', 'ConfirmPage'),
+    'desktop':              ('.desktop', 'DesktopPage'),
+    'disk':                 ('.disk', 'DiskPage'),
+    'done':                 ('.done', 'DonePage'),
+    'encrypt':              ('.encrypt', 'EncryptPage'),
+    'failed':               ('.failed', 'FailedPage'),
+    'feature':              ('.choices', 'FeaturePage'),
+    'format':               ('.filter', 'FormatPage'),
+    'install':              ('.install', 'InstallPage'),
+    'internet':             ('.internet', 'InternetPage'),
+    'keyboard-language':    ('.keyboard', 'KeyboardLanguagePage'),
+    'keyboard-layout':      ('.keyboard', 'KeyboardLayoutPage'),
+    'keyboard-overview':    ('.keyboard', 'KeyboardOverviewPage'),
+    'language':             ('.language', 'LanguagePage'),
+    'locale':               ('.locale', 'LocalePage'),
+    'partition':            ('.partition', 'PartitionPage'),
+    'restart':              ('.restart', 'RestartPage'),
+    'software':             ('.choices', 'SoftwarePage'),
+    'summary':              ('.summary', 'SummaryPage'),
+    'timezone':             ('.filter', 'TimezonePage'),
+    'user':                 ('.user', 'UserPage'),
+    'welcome':              ('.welcome', 'WelcomePage'),
 }
 
 reloadable_pages = ['disk', 'partition']
 
+# pages holding input that is not fully stored in config, e.g. unconfirmed
+# passwords, they are kept until left for good
+input_pages = {'encrypt', 'user'}
+
+# pages that can be built before they are shown: no side effects on creation
+# and their content does not depend on choices made on the previous page
+prebuildable_pages = {'confirm', 'desktop', 'encrypt', 'feature',
+                      'keyboard-overview', 'locale', 'software', 'summary',
+                      'user', 'welcome'}
+
+
+def _get_page_type(page_name):
+    '''
+    Import the module of a page on first use. Importing binds the page
+    template, so pages that are never shown never load their template.
+    '''
+    page_type = page_name_to_type[page_name]
+    if isinstance(page_type, tuple):
+        module_name, type_name = page_type
+        module = import_module(module_name, __package__)
+        page_type = getattr(module, type_name)
+        page_name_to_type[page_name] = page_type
+    return page_type
+
 
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/widgets/page_wrapper.ui')
 class PageWrapper(Adw.NavigationPage):
@@ -148,7 +155,7 @@ class PageWrapper(Adw.NavigationPage):
         del self.page
 
     def _set_new_page(self, page_name):
-        self.page = page_name_to_type[page_name]()
+        self.page = _get_page_type(page_name)()
         self.page_name = page_name
         self.content.set_child(self.page)
         if self.page_name in special_image_pages:
@@ -163,6 +170,11 @@ class PageWrapper(Adw.NavigationPage):
         self.set_title(page_title)
         self.set_tag(page_name)
 
+    def _rebuild_page(self):
+        config.unsubscribe(self.page)
+        del self.page
+        self._set_new_page(self.page_name)
+
     def _get_page_title(self):
         page_title = page_name_to_page_title[self.page_name]
         if page_title == None:
@@ -193,9 +205,14 @@ class PageWrapper(Adw.NavigationPage):
     def reload(self):
         if not self.page_name in reloadable_pages:
             return
-        config.unsubscribe(self.page)
-        del self.page
-        self._set_new_page(self.page_name)
+        self._rebuild_page()
+
+    def retranslate(self, retranslator):
+        retranslator.retranslate_widget(self)
+
+        page_title = self._get_page_title()
+        self.title_label.set_label(page_title)
+        self.set_title(page_title)
 
     def update_navigation_buttons(self, is_first: bool, is_last: bool):
         self.previous_button.set_visible(not is_first)
@@ -76,9 +76,10 @@ class PartitionPage(Gtk.Stack):
         self.disk = selected_disk
 
     def _store_device_info(self, info):
-        config.set('disk', (info.device_path, info.name))
-        config.set('disk_is_partition', not type(info) == type(self.disk))
-        config.set('disk_efi_partition', self.disk.efi_partition)
+        with config.batch():
+            config.set('disk', (info.device_path, info.name))
+            config.set('disk_is_partition', not type(info) == type(self.disk))
+            config.set('disk_efi_partition', self.disk.efi_partition)
 
     ### callbacks ###
 
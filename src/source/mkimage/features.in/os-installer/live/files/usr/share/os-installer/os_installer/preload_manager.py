@@ -1,39 +1,168 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from threading import Thread
+from functools import partial
+from heapq import heappop, heappush
+from threading import Event, Lock, Thread
+from time import perf_counter
 
 from .config import config
+from .preloadable import Preloadable
+from .state_machine import page_order
 
 from .choices_provider import choices_provider
 from .desktop_provider import desktop_provider
 from .disk_provider import disk_provider
 from .format_provider import format_provider
 from .internet_provider import internet_provider
+from .keyboard_layout_provider import keyboard_layout_provider
 from .language_provider import language_provider
 from .timezone_provider import timezone_provider
 from .welcome_provider import welcome_provider
 
-providers = [language_provider, welcome_provider, internet_provider, disk_provider,
-             desktop_provider, format_provider, timezone_provider, choices_provider]
+providers = [language_provider, welcome_provider, keyboard_layout_provider, internet_provider,
+             disk_provider, desktop_provider, format_provider, timezone_provider, choices_provider]
+
+# pages not in page order, mapped to the page they are reached from
+subpage_to_page = {
+    'format':               'locale',
+    'keyboard-language':    'keyboard-overview',
+    'keyboard-layout':      'keyboard-overview',
+    'timezone':             'locale',
+}
+
+
+def _page_index(page_name):
+    page_name = subpage_to_page.get(page_name, page_name)
+    return page_order.index(page_name)
 
 
 class PreloadManager:
+    '''
+    Preloads providers in order of the first page needing them. Providers that
+    others depend on inherit the priority of their dependents. Only as many
+    preloads as the thread pool has workers run at once, so the most urgent
+    preload always gets the next free worker.
+    '''
+
     def __init__(self):
         self.thread = Thread(target=self._preload)
+        self.lock = Lock()
+        self.all_done = Event()
 
-    def _preload(self):
+        self.priorities = self._determine_priorities()
+        self.ready = []
+        self.waiting = []
+        self.done = set()
+        self.running = 0
+        self.decisions = []
+
+    def _determine_priorities(self):
+        priorities = {}
         for provider in providers:
+            indices = [_page_index(page) for page in provider.needed_by]
+            priorities[provider] = min(indices, default=len(page_order))
+
+        # propagate urgency to dependencies until nothing changes
+        changed = True
+        while changed:
+            changed = False
+            for provider in providers:
+                for dependency in provider.depends_on:
+                    if priorities[provider] < priorities[dependency]:
+                        priorities[dependency] = priorities[provider]
+                        changed = True
+        return priorities
+
+    def _log(self, provider, event):
+        elapsed = perf_counter() - self.start_time
+        self.decisions.append((elapsed, provider.__class__.__name__, event))
+
+    def _queue(self, provider):
+        # called with lock held
+        if all(dependency in self.done for dependency in provider.depends_on):
+            self._log(provider, 'ready')
+            heappush(self.ready, (self.priorities[provider],
+                                  providers.index(provider), provider))
+        else:
+            self._log(provider, 'waiting for dependencies')
+            self.waiting.append(provider)
+
+    def _start_ready(self):
+        to_start = []
+        with self.lock:
+            while self.ready and self.running < Preloadable.thread_pool_workers:
+                _, _, provider = heappop(self.ready)
+                self._log(provider, 'started')
+                self.running += 1
+                to_start.append(provider)
+
+        for provider in to_start:
             provider.preload()
+            provider.future.add_done_callback(
+                partial(self._preload_finished, provider))
+
+    def _preload_finished(self, provider, future):
+        with self.lock:
+            self.running -= 1
+            self.done.add(provider)
+            if future.exception():
+                self._log(provider, f'failed: {future.exception()}')
+            else:
+                self._log(provider, 'finished')
+
+            for waiting in list(self.waiting):
+                if all(dependency in self.done for dependency in waiting.depends_on):
+                    self.waiting.remove(waiting)
+                    self._queue(waiting)
+
+            if len(self.done) == len(providers):
+                self.all_done.set()
+
+        self._start_ready()
+
+    def _preload(self):
+        self.start_time = perf_counter()
+
+        with self.lock:
+            for provider in providers:
+                provider.preload_requested = True
+                if provider.config_var:
+                    # preloaded whenever the config variable changes
+                    provider.preload()
+                    self.done.add(provider)
+            for provider in providers:
+                if not provider.config_var:
+                    self._queue(provider)
+            if len(self.done) == len(providers):
+                self.all_done.set()
+        self._start_ready()
 
         # in testing mode locale might not get set, update it here
         if config.get('test_mode'):
             config.set('locale', config.get('locale'))
 
+        self.all_done.wait()
         for provider in providers:
             provider.assert_preloaded()
 
+        if config.get('test_mode'):
+            self.print_statistics()
+
     ### public methods ###
 
+    def get_statistics(self):
+        '''Returns (priority, name, preload duration in seconds) per provider.'''
+        return [(self.priorities[provider], provider.__class__.__name__,
+                 provider.preload_duration)
+                for provider in sorted(providers, key=self.priorities.get)]
+
+    def print_statistics(self):
+        for elapsed, name, event in self.decisions:
+            print(f'Preload {elapsed:.3f}s {name}: {event}')
+        for priority, name, duration in self.get_statistics():
+            duration = f'{duration:.3f}s' if duration is not None else 'n/a'
+            print(f'Preload priority {priority} {name} took {duration}')
+
     def start(self):
         self.thread.start()
 
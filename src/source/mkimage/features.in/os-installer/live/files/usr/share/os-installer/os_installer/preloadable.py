@@ -1,21 +1,78 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from threading import Lock
+from time import perf_counter
+import os
 
 from .config import config
+from .provider_cache import provider_cache
+from .startup_profiler import startup_profiler
 
 
 class Preloadable:
     # static thread pool
-    thread_pool = ThreadPoolExecutor()
+    thread_pool_workers = min(32, (os.cpu_count() or 1) + 4)
+    thread_pool = ThreadPoolExecutor(max_workers=thread_pool_workers)
 
-    def __init__(self, preload_func, config_var=None):
+    def __init__(self, preload_func, config_var=None, needed_by=(), depends_on=()):
+        '''
+        needed_by: names of the pages using this provider, used for priority
+        depends_on: providers that need to be preloaded before this one
+        '''
         self.preload_func = preload_func
         self.config_var = config_var
+        self.needed_by = tuple(needed_by)
+        self.depends_on = tuple(depends_on)
         self.preload_started = False
+        self.preload_requested = False
         self.preloaded = False
+        self.preload_duration = None
         self.preloading_lock = Lock()
+        # dependent preloads of older values are superseded by newer ones
+        self.generation = 0
+        self.requested_value = None
+
+    def _timed_preload(self, *args):
+        start = perf_counter()
+        try:
+            with startup_profiler.span(f'preload {self.__class__.__name__}'):
+                self.preload_func(*args)
+        finally:
+            self.preload_duration = perf_counter() - start
+
+    def _dependent_preload(self, generation, value):
+        # newer value requested while queued
+        if generation != self.generation:
+            return
+        self._timed_preload(value)
+
+    def _future_done(self, callback, future):
+        with self.preloading_lock:
+            superseded = future is not self.future
+        if superseded:
+            # wait for the preload of the current value instead
+            config.defer(self.when_preloaded, callback)
+        else:
+            config.defer(callback)
+
+    def is_superseded(self, value):
+        '''
+        Whether a newer value than the given one was requested for a dependent
+        preload. Lengthy preloads should check this and stop early.
+        '''
+        return self.requested_value != value
+
+    def load_cached(self, name, extra_key, compute_func, encode, decode,
+                    libraries=()):
+        '''
+        Returns the list computed by compute_func, from the on-disk cache if
+        possible. encode/decode convert list items from/to json data.
+        libraries: file name prefixes of the libraries compute_func uses
+        '''
+        return provider_cache.load_or_compute(
+            name, extra_key, compute_func, encode, decode, libraries)
 
     ### public methods ###
 
@@ -25,8 +82,9 @@ class Preloadable:
                 return
 
             if not self.preload_started:
-                class_name = self.__class__.__name__
-                print(f'Preloading for {class_name} was never started')
+                if not self.preload_requested:
+                    class_name = self.__class__.__name__
+                    print(f'Preloading for {class_name} was never started')
                 self.preloading_lock.release()
                 self.preload()
                 self.preloading_lock.acquire()
@@ -35,20 +93,45 @@ class Preloadable:
             self.future.result()
             self.preloaded = True
 
+    def when_preloaded(self, callback):
+        '''
+        Calls callback once preloading finished, without blocking. If that
+        is already the case it is called right away, otherwise from the main
+        loop. Starts preloading if that did not happen yet.
+        '''
+        self.preload()
+        with self.preloading_lock:
+            future = None if self.preloaded else self.future
+
+        if future is None or future.done():
+            callback()
+        else:
+            future.add_done_callback(partial(self._future_done, callback))
+
     def preload(self):
         with self.preloading_lock:
             if self.config_var:
-                self.preloaded = True
+                # don't mark a running dependent preload as done
+                if not self.preload_started:
+                    self.preloaded = True
                 config.subscribe(
                     self.config_var, self.dependent_preload, delayed=True)
             else:
                 if self.preload_started:
                     return
-                self.future = self.thread_pool.submit(self.preload_func)
+                self.future = self.thread_pool.submit(self._timed_preload)
                 self.preload_started = True
 
     def dependent_preload(self, value):
         with self.preloading_lock:
+            previous = self.future if self.preload_started else None
+            self.generation += 1
+            self.requested_value = value
             self.preloaded = False
-            self.future = self.thread_pool.submit(self.preload_func, value)
+            self.future = self.thread_pool.submit(
+                self._dependent_preload, self.generation, value)
             self.preload_started = True
+
+        # only succeeds if not running yet, runs done callbacks right away
+        if previous:
+            previous.cancel()
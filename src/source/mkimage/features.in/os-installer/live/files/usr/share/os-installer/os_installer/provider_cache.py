@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+On-disk cache for deterministic provider results.
+Entries are only used if their key matches, the key contains the UI locale and
+the version of the locale data. Entries also record the versions of the
+libraries their results were derived from, which have to match as well.
+'''
+
+from tempfile import NamedTemporaryFile
+from threading import Lock
+import json
+import locale as Locale
+import os
+
+from gi.repository import GLib
+
+# bump when the format of cached data changes
+CACHE_FORMAT_VERSION = 2
+
+# can be baked into the installation medium by copying a filled writable cache
+READ_ONLY_CACHE_PATH = '/usr/share/os-installer/cache'
+WRITABLE_CACHE_PATH = os.path.join(
+    os.environ.get('XDG_RUNTIME_DIR') or GLib.get_user_cache_dir(),
+    'os-installer-cache')
+
+locale_data_paths = ['/usr/lib/locale/locale-archive', '/usr/lib/locale']
+
+
+def _file_version(path):
+    # the resolved file name usually contains the full library version
+    stat = os.stat(path)
+    return f'{os.path.basename(os.path.realpath(path))}:{stat.st_size}:{int(stat.st_mtime)}'
+
+
+def _get_library_versions(libraries):
+    '''
+    Versions of the loaded libraries whose file names start with one of the
+    given names, by path. None if one of them is not loaded.
+    '''
+    versions = {}
+    missing = set(libraries)
+    try:
+        with open('/proc/self/maps') as maps:
+            for line in maps:
+                path = line.split()[-1]
+                file_name = os.path.basename(path)
+                for library in libraries:
+                    if file_name.startswith(library) and not path in versions:
+                        versions[path] = _file_version(path)
+                        missing.discard(library)
+    except Exception as e:
+        print(f'Could not determine library versions: {e}')
+        return None
+
+    if missing:
+        print(f'Libraries {sorted(missing)} are not loaded, not caching.')
+        return None
+    return versions
+
+
+def _libraries_unchanged(versions):
+    try:
+        return all(_file_version(path) == version
+                   for path, version in versions.items())
+    except OSError:
+        return False
+
+
+def _get_locale_data_version():
+    for path in locale_data_paths:
+        if os.path.exists(path):
+            return _file_version(path)
+
+
+class ProviderCache:
+    def __init__(self):
+        self.lock = Lock()
+        self.locale_data_version = None
+
+    def _get_key(self, extra_key):
+        with self.lock:
+            if self.locale_data_version is None:
+                self.locale_data_version = _get_locale_data_version()
+        key = {
+            'format': CACHE_FORMAT_VERSION,
+            'ui_locale': Locale.setlocale(Locale.LC_MESSAGES),
+            'locales': self.locale_data_version,
+            'extra': extra_key,
+        }
+        # normalize to what reading back from json yields
+        return json.loads(json.dumps(key))
+
+    def _read(self, directory, name, key):
+        path = os.path.join(directory, f'{name}.json')
+        try:
+            with open(path, 'r') as file:
+                entry = json.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f'Ignoring unreadable cache {path}: {e}')
+            return None
+
+        if entry.get('key') != key:
+            return None
+        if not _libraries_unchanged(entry.get('libraries', {})):
+            return None
+        return entry.get('data')
+
+    def _write(self, name, key, libraries, data):
+        # libraries are loaded once the result was computed with them
+        if (versions := _get_library_versions(libraries)) is None:
+            return
+        try:
+            os.makedirs(WRITABLE_CACHE_PATH, exist_ok=True)
+            with NamedTemporaryFile('w', dir=WRITABLE_CACHE_PATH, delete=False) as file:
+                json.dump({'key': key, 'libraries': versions, 'data': data}, file)
+            os.replace(file.name, os.path.join(WRITABLE_CACHE_PATH, f'{name}.json'))
+        except Exception as e:
+            print(f'Could not write cache for {name}: {e}')
+
+    ### public methods ###
+
+    def load_or_compute(self, name, extra_key, compute_func, encode, decode,
+                        libraries=()):
+        '''
+        Returns a list either decoded from cache or computed via compute_func.
+        Results of None are not cached.
+        encode and decode convert single items from/to json serializable data.
+        libraries: file name prefixes of the libraries the result comes from
+        '''
+        key = self._get_key(extra_key)
+        for directory in [WRITABLE_CACHE_PATH, READ_ONLY_CACHE_PATH]:
+            if (data := self._read(directory, name, key)) is not None:
+                return [decode(item) for item in data]
+
+        # None signals that computation was aborted
+        if (result := compute_func()) is not None:
+            self._write(name, key, libraries, [encode(item) for item in result])
+        return result
+
+
+provider_cache = ProviderCache()
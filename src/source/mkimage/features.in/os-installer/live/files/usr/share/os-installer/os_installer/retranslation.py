@@ -0,0 +1,78 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+Re-applies translations to built widget trees after the app language changed.
+Template strings are handled here: their message ids are read from the
+templates, texts they were translated to in the previous language are mapped
+back to them. Widgets showing formatted or generated texts update those in
+their retranslated() method.
+'''
+
+from functools import cache
+from locale import gettext as _
+from xml.etree import ElementTree
+import gettext
+
+from gi.repository import Gio
+
+from .config import config
+
+ui_resource_path = '/com/github/p3732/os-installer/ui/'
+
+# widget properties holding template strings, user input is never touched
+translatable_properties = ['label', 'title', 'subtitle', 'description',
+                           'placeholder-text', 'tooltip-text']
+
+
+def _read_message_ids(path):
+    message_ids = set()
+    for name in Gio.resources_enumerate_children(path, Gio.ResourceLookupFlags.NONE):
+        if name.endswith('/'):
+            message_ids |= _read_message_ids(path + name)
+        elif name.endswith('.ui'):
+            data = Gio.resources_lookup_data(path + name, Gio.ResourceLookupFlags.NONE)
+            template = ElementTree.fromstring(data.get_data())
+            message_ids.update(element.text for element in template.iter()
+                               if element.get('translatable') == 'yes' and element.text)
+    return message_ids
+
+
+@cache
+def _get_template_message_ids():
+    return frozenset(_read_message_ids(ui_resource_path))
+
+
+class Retranslator:
+    def __init__(self, previous_language_code):
+        translation = gettext.translation(
+            'os-installer', config.get('localedir'),
+            languages=[previous_language_code], fallback=True)
+        # untranslated message ids map to themselves
+        self.message_ids = {translation.gettext(message_id): message_id
+                            for message_id in _get_template_message_ids()}
+
+    ### public methods ###
+
+    def retranslate_text(self, text):
+        if not text:
+            return text
+        return _(self.message_ids.get(text, text))
+
+    def retranslate_widget(self, widget):
+        '''Retranslates the widget and all its descendants.'''
+        for property_name in translatable_properties:
+            if widget.find_property(property_name) is None:
+                continue
+            text = widget.get_property(property_name)
+            if not isinstance(text, str):
+                continue
+            if (translated := self.retranslate_text(text)) != text:
+                widget.set_property(property_name, translated)
+
+        child = widget.get_first_child()
+        while child:
+            self.retranslate_widget(child)
+            child = child.get_next_sibling()
+
+        if hasattr(widget, 'retranslated'):
+            widget.retranslated(self)
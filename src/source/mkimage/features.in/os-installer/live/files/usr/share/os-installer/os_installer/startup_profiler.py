@@ -0,0 +1,171 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+Records a wall-clock timeline of the installer startup.
+Must not import gi or other installer modules, it is set up before them.
+'''
+
+from threading import Lock
+import json
+import os
+import sys
+import time
+
+# imports that are timed, loading these creates typelibs and module singletons
+_timed_prefixes = ('gi.repository.', 'os_installer.')
+
+
+def _now():
+    return time.clock_gettime(time.CLOCK_BOOTTIME)
+
+
+def _get_process_start():
+    # field 22 of /proc/self/stat is the start time in clock ticks since boot
+    try:
+        with open('/proc/self/stat') as file:
+            stat = file.read()
+        fields = stat[stat.rindex(')') + 2:].split()
+        return int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except Exception:
+        return _now()
+
+
+class _TimedLoader:
+    def __init__(self, profiler, name, loader):
+        self.profiler = profiler
+        self.name = name
+        self.loader = loader
+
+    def __getattr__(self, attribute):
+        return getattr(self.loader, attribute)
+
+    def create_module(self, spec):
+        if not hasattr(self.loader, 'create_module'):
+            return None
+        with self.profiler.span(f'import {self.name} (create)'):
+            return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self.profiler.span(f'import {self.name}'):
+            self.loader.exec_module(module)
+
+
+class _TimingFinder:
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        if not fullname.startswith(_timed_prefixes):
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            if spec := finder.find_spec(fullname, path, target):
+                if spec.loader and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(
+                        self.profiler, fullname, spec.loader)
+                return spec
+        return None
+
+
+class _Span:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = _now()
+
+    def __exit__(self, *args):
+        self.profiler.add_event(self.name, self.start, _now())
+
+
+class StartupProfiler:
+    '''
+    Collects (name, start, end) events relative to interpreter start.
+    Does nothing until started.
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = Lock()
+        self.events = []
+        self.report_path = None
+        self.budget = None
+        self.first_frame = None
+
+    def _wrap_require_version(self):
+        import gi
+        require_version = gi.require_version
+
+        def timed_require_version(namespace, version):
+            with self.span(f'gi.require_version {namespace} {version}'):
+                return require_version(namespace, version)
+        gi.require_version = timed_require_version
+
+    def _write_report(self):
+        report = {
+            'time_to_first_frame': self.first_frame,
+            'budget': self.budget,
+            'events': sorted(self.events, key=lambda e: e['start']),
+        }
+        with open(self.report_path, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f'Startup profile written to {self.report_path}')
+
+    ### public methods ###
+
+    def add_event(self, name, start, end=None):
+        if not self.enabled:
+            return
+        if end is None:
+            end = start
+        with self.lock:
+            self.events.append({
+                'name': name,
+                'start': round(start - self.process_start, 6),
+                'duration': round(end - start, 6),
+            })
+
+    def mark(self, name):
+        self.add_event(name, _now())
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def start(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.process_start = _get_process_start()
+        self.mark('profiler started')
+        sys.meta_path.insert(0, _TimingFinder(self))
+        self._wrap_require_version()
+
+    def configure(self, report_path, budget=None):
+        self.report_path = report_path
+        self.budget = budget
+
+    def first_frame_drawn(self):
+        '''Returns whether the application should quit.'''
+        if not self.enabled or self.first_frame is not None:
+            return False
+        self.mark('first frame')
+        self.first_frame = round(_now() - self.process_start, 6)
+        print(f'Time to first frame: {self.first_frame:.3f}s')
+
+        if self.report_path:
+            self._write_report()
+        return self.budget is not None
+
+    def over_budget(self):
+        if self.budget is None or self.first_frame is None:
+            return False
+        if self.first_frame > self.budget:
+            print(f'Time to first frame exceeds budget of {self.budget:.3f}s')
+            return True
+        return False
+
+
+startup_profiler = StartupProfiler()
@@ -32,11 +32,22 @@ class StateMachine:
         self.latest_page = 0
         if not config.get('internet_connection_required'):
             installation_scripting.can_run_prepare()
+        else:
+            # lets preparation and image prefetching start as soon as online
+            config.subscribe('internet_connection', self._internet_connection_changed)
+
+    def _internet_connection_changed(self, connected):
+        if connected:
+            installation_scripting.can_run_prepare()
+
+    def retranslates(self, prev_page):
+        '''Whether leaving the page requires all other pages to be rebuilt.'''
+        return prev_page == 'language'
 
     def transition(self, prev_page, reached_page):
         ret_val = None
 
-        if prev_page == 'language':
+        if self.retranslates(prev_page):
             ret_val = 'retranslate'
 
         new_index = page_order.index(reached_page)
@@ -1,5 +1,6 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from collections import defaultdict
 from time import time
 
 from gi.repository import GnomeDesktop, GObject, GWeather
@@ -19,6 +20,14 @@ class Timezone(GObject.Object):
         self.locations: set = set()
 
 
+# substrings up to this length are indexed, longer queries intersect them
+NGRAM_LENGTH = 3
+
+
+def _ngrams(text, length):
+    return {text[i:i+length] for i in range(len(text) - length + 1)}
+
+
 def _get_location_children(location):
     current_child = None
     children = []
@@ -44,14 +53,18 @@ def _recurse_location(location, timezone_map):
             print(f'Developer hint: Unknown timezone {id} {child.get_name()}')
 
 
+def _timezone_from_cache(entry):
+    name, locations = entry
+    timezone = Timezone(name)
+    timezone.locations = set(locations)
+    return timezone
+
+
 class TimezoneProvider(Preloadable):
     def __init__(self):
-        Preloadable.__init__(self, self._get_timezones)
-
-    def _get_timezones(self):
-        current_timezone = GnomeDesktop.WallClock().get_timezone()
-        config.set('timezone', current_timezone.get_identifier())
+        Preloadable.__init__(self, self._get_timezones, needed_by=['timezone'])
 
+    def _get_all_timezones(self):
         timezone_map = dict()
         for timezone in GWeather.Location().get_world().get_timezones():
             id = timezone.get_identifier()
@@ -61,7 +74,31 @@ class TimezoneProvider(Preloadable):
             if not child.has_timezone():  # skips UTC and Etc/GMT+12
                 _recurse_location(child, timezone_map)
 
-        self.timezones = sorted(timezone_map.values(), key=lambda t: t.name)
+        return sorted(timezone_map.values(), key=lambda t: t.name)
+
+    def _get_timezones(self):
+        current_timezone = GnomeDesktop.WallClock().get_timezone()
+        config.set('timezone', current_timezone.get_identifier())
+
+        self.timezones = self.load_cached(
+            'timezones', None, self._get_all_timezones,
+            lambda timezone: (timezone.name, sorted(timezone.locations)),
+            _timezone_from_cache, libraries=['libgweather'])
+        self._build_search_index()
+
+    def _build_search_index(self):
+        # maps all short substrings of names to the names of their timezones
+        self.ngram_index = defaultdict(set)
+        self.search_texts = {}
+        for timezone in self.timezones:
+            names = [timezone.lower_case_name, *timezone.locations]
+            for name in names:
+                for length in range(1, NGRAM_LENGTH + 1):
+                    for ngram in _ngrams(name, length):
+                        self.ngram_index[ngram].add(timezone.name)
+            # newline separated, as queries never contain one
+            self.search_texts[timezone.name] = '\n'.join(names)
+        self.all_timezone_names = frozenset(self.search_texts)
 
     ### public methods ###
 
@@ -69,5 +106,27 @@ class TimezoneProvider(Preloadable):
         self.assert_preloaded()
         return self.timezones
 
+    def search_timezones(self, search_text, candidates=None):
+        '''
+        Returns names of timezones whose name or locations contain the lower
+        case search_text. If given, only timezone names in candidates are
+        considered, e.g. the result for a query that search_text extends.
+        '''
+        self.assert_preloaded()
+
+        if not search_text:
+            return self.all_timezone_names
+
+        if candidates is None:
+            if len(search_text) <= NGRAM_LENGTH:
+                return self.ngram_index.get(search_text, frozenset())
+            ngram_matches = sorted(
+                (self.ngram_index.get(ngram, frozenset())
+                 for ngram in _ngrams(search_text, NGRAM_LENGTH)), key=len)
+            candidates = ngram_matches[0].intersection(*ngram_matches[1:])
+
+        return {name for name in candidates
+                if search_text in self.search_texts[name]}
+
 
 timezone_provider = TimezoneProvider()
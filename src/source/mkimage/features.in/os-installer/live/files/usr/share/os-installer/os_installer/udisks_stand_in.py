@@ -0,0 +1,140 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+Stand-in for the parts of UDisks.Client used by DiskProvider.
+Used in demo mode and to test disk handling without real devices.
+'''
+
+from types import SimpleNamespace
+
+EFI_PARTITION_GUID = 'C12A7328-F81F-11D2-BA4B-00A0C93EC93B'
+LINUX_PARTITION_GUID = '0FC63DAF-8483-4772-8E79-3D69D8477DE4'
+
+size_units = ['B', 'KB', 'MB', 'GB', 'TB', 'PB']
+
+
+class StandInObject:
+    def __init__(self, object_path, block=None, drive=None, partition=None,
+                 partition_table=None):
+        self.object_path = object_path
+        self.block = block
+        self.drive = drive
+        self.partition = partition
+        self.partition_table = partition_table
+
+    def get_block(self):
+        return self.block
+
+    def get_drive(self):
+        return self.drive
+
+    def get_object_path(self):
+        return self.object_path
+
+    def get_partition(self):
+        return self.partition
+
+    def get_partition_table(self):
+        return self.partition_table
+
+
+def _props(**kwargs):
+    return SimpleNamespace(props=SimpleNamespace(**kwargs))
+
+
+class StandInClient:
+    def __init__(self):
+        self.objects = {}
+        self.handlers = {}
+
+    def _emit(self, signal):
+        for func, args in self.handlers.get(signal, []):
+            func(self, *args)
+
+    def _add(self, udisks_object):
+        self.objects[udisks_object.get_object_path()] = udisks_object
+
+    ### UDisks.Client interface ###
+
+    def connect(self, signal, func, *args):
+        self.handlers.setdefault(signal, []).append((func, args))
+
+    def get_drive_for_block(self, block):
+        if drive_object := self.objects.get(block.props.drive):
+            return drive_object.get_drive()
+        return None
+
+    def get_object(self, object_path):
+        return self.objects.get(object_path)
+
+    def get_object_manager(self):
+        return self
+
+    def get_objects(self):
+        return list(self.objects.values())
+
+    def get_size_for_display(self, size, use_pow2, long_string):
+        value = size
+        for unit in size_units:
+            if value < 1000 or unit == size_units[-1]:
+                return f'{value:.1f} {unit}'
+            value /= 1000
+
+    ### public methods ###
+
+    def add_disk(self, name, size, device_path, partitions=(), optical=False):
+        '''
+        Adds a disk and emits "changed", like UDisks does on hotplug.
+        partitions: sequence of (label, size, device_path, is_efi)
+        '''
+        device_name = device_path.removeprefix('/dev/')
+        drive_path = f'/org/freedesktop/UDisks2/drives/{device_name}'
+        self._add(StandInObject(drive_path, drive=_props(
+            vendor=name, model='', optical=optical)))
+
+        partition_paths = []
+        for label, partition_size, partition_device, is_efi in partitions:
+            partition_name = partition_device.removeprefix('/dev/')
+            path = f'/org/freedesktop/UDisks2/block_devices/{partition_name}'
+            guid = EFI_PARTITION_GUID if is_efi else LINUX_PARTITION_GUID
+            self._add(StandInObject(
+                path,
+                block=_props(device=partition_device, size=partition_size,
+                             id_label=label, drive=drive_path),
+                partition=_props(type=guid)))
+            partition_paths.append(path)
+
+        self._add(StandInObject(
+            f'/org/freedesktop/UDisks2/block_devices/{device_name}',
+            block=_props(device=device_path, size=size, id_label='',
+                         drive=drive_path),
+            partition_table=_props(partitions=partition_paths)))
+        self._emit('changed')
+
+    def remove_disk(self, device_path):
+        '''Removes a disk with its partitions and emits "changed".'''
+        drive_path = None
+        for udisks_object in self.get_objects():
+            if (block := udisks_object.get_block()) and block.props.device == device_path:
+                drive_path = block.props.drive
+        self.objects = {
+            path: udisks_object for path, udisks_object in self.objects.items()
+            if path != drive_path and not (
+                udisks_object.get_block() and
+                udisks_object.get_block().props.drive == drive_path)}
+        self._emit('changed')
+
+
+def create_demo_client():
+    client = StandInClient()
+    client.add_disk('Dummy', 10000, '/dev/null',
+                    [('Too small partiton', 1000, '/dev/00null', False)])
+    client.add_disk('Totally real device', 100000000000, '/dev/sda', [
+        ('EFI', 200000000, '/dev/sda_efi', True),
+        ('Previous Installation', 20000000000, '/dev/sda_yes', False),
+        ('', 20000000000, '/dev/sda_unnamed', False),
+        ('', 20000000000, '/dev/sda_unnamed2', False),
+        ('Swap', 20000000000, '/dev/sda_swap', False),
+    ])
+    client.add_disk('VERY BIG DISK', 1000000000000000, '/dev/sdb_very_big')
+    return client
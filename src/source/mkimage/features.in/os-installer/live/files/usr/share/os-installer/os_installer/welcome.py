@@ -18,6 +18,13 @@ class WelcomePage(Gtk.Box):
     def __init__(self, **kwargs):
         Gtk.Box.__init__(self, **kwargs)
 
+        self.default_text = self.description.get_label()
+        self._set_description()
+
+        # title image gets updated once loaded
+        welcome_provider.preload()
+
+    def _set_description(self):
         welcome = config.get('welcome_page')
         language_code = config.get('language')[0]
 
@@ -26,11 +33,12 @@ class WelcomePage(Gtk.Box):
         elif welcome['text']:
             text = welcome['text']
         else:
-            text = self.description.get_label()
-            text = text.format(config.get('distribution_name'))
+            text = self.default_text.format(config.get('distribution_name'))
         self.description.set_label(text)
 
-        welcome_provider.assert_preloaded()
+    def retranslated(self, retranslator):
+        self.default_text = retranslator.retranslate_text(self.default_text)
+        self._set_description()
 
     ### callbacks ###
 
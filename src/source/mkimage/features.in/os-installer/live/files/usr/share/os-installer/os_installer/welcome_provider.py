@@ -10,7 +10,7 @@ from .preloadable import Preloadable
 
 class WelcomeProvider(Preloadable):
     def __init__(self):
-        Preloadable.__init__(self, self._load_image)
+        Preloadable.__init__(self, self._load_image, needed_by=['welcome'])
 
     def _load_image(self):
         welcome = config.get('welcome_page')
@@ -1,6 +1,9 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
-from gi.repository import Adw, Gtk
+from gi.repository import Adw, Gtk, Pango
+
+# maximum height of recycling lists, only rows visible within it get created
+recycling_list_height = 480
 
 
 def reset_model(model, new_values):
@@ -12,6 +15,30 @@ def reset_model(model, new_values):
     model.splice(0, n_prev_items, new_values)
 
 
+def count_widgets(widget):
+    '''Number of widgets in the tree below and including widget.'''
+    count = 1
+    child = widget.get_first_child()
+    while child:
+        count += count_widgets(child)
+        child = child.get_next_sibling()
+    return count
+
+
+def _replace_widget(old, new):
+    parent = old.get_parent()
+    if isinstance(parent, Gtk.Stack):
+        # removing the visible child makes the stack show another one
+        visible_name = parent.get_visible_child_name()
+        name = parent.get_page(old).get_name()
+        parent.remove(old)
+        parent.add_named(new, name)
+        parent.set_visible_child_name(visible_name)
+    else:
+        parent.insert_child_after(new, old)
+        parent.remove(old)
+
+
 class EntryErrorEnhancer():
     def __init__(self, row, condition):
         self.row = row
@@ -73,13 +100,20 @@ class DeviceRow(Adw.ActionRow):
 
         self.set_subtitle(info.device_path)
 
+        self.required_size_str = required_size_str
+        self.too_small_text = self.too_small_label.get_label()
         if required_size_str:
-            smol = self.too_small_label.get_label()
-            self.too_small_label.set_label(smol.format(required_size_str))
+            self.too_small_label.set_label(self.too_small_text.format(required_size_str))
             self.set_activatable(False)
             self.set_sensitive(False)
             self.stack.set_visible_child_name('too_small')
 
+    def retranslated(self, retranslator):
+        self.too_small_text = retranslator.retranslate_text(self.too_small_text)
+        if self.required_size_str:
+            self.too_small_label.set_label(
+                self.too_small_text.format(self.required_size_str))
+
 
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/widgets/multi_selection_row.ui')
 class MultiSelectionRow(Adw.ComboRow):
@@ -177,3 +211,73 @@ class SummaryRow(Gtk.ListBoxRow):
             self.icon.set_from_file(choice.icon_path)
         else:
             self.icon.set_from_icon_name(choice.icon_name)
+
+
+class RecyclingItem(Gtk.Box):
+    '''
+    Looks like a progress row, but is a plain widget, as list views wrap
+    their items into rows themselves.
+    '''
+    __gtype_name__ = __qualname__
+
+    def __init__(self, **kwargs):
+        super().__init__(spacing=12, **kwargs)
+
+        self.title = Gtk.Label(xalign=0, hexpand=True,
+                               ellipsize=Pango.EllipsizeMode.END)
+        self.append(self.title)
+        self.append(Gtk.Image.new_from_icon_name('go-next-symbolic'))
+
+
+def _setup_item(factory, list_item):
+    list_item.set_child(RecyclingItem())
+
+
+def _bind_item(factory, list_item):
+    list_item.get_child().title.set_label(list_item.get_item().name)
+
+
+def _create_item_factory():
+    factory = Gtk.SignalListItemFactory()
+    factory.connect('setup', _setup_item)
+    factory.connect('bind', _bind_item)
+    return factory
+
+
+# shared by all recycling lists, items themselves are recycled per list
+item_factory = _create_item_factory()
+
+
+class RecyclingList(Gtk.ScrolledWindow):
+    '''
+    Shows items with a name like progress rows. Unlike a list box only rows
+    for visible items exist, they get reused for other items while scrolling.
+    Takes the place of a list box from a template, as those are precompiled.
+    '''
+    __gtype_name__ = __qualname__
+
+    def __init__(self, list_box, model, activated, **kwargs):
+        super().__init__(**kwargs)
+
+        self.model = model
+        self.activated = activated
+
+        self.view = Gtk.ListView(
+            factory=item_factory, model=Gtk.NoSelection(model=model),
+            single_click_activate=True)
+        # row padding and separators, the scrolled window is the card
+        self.view.add_css_class('rich-list')
+        self.view.connect('activate', self._activate)
+
+        self.set_child(self.view)
+        self.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        self.set_propagate_natural_height(True)
+        self.set_max_content_height(recycling_list_height)
+        self.set_hexpand(list_box.get_hexpand())
+        self.set_margin_bottom(list_box.get_margin_bottom())
+        self.add_css_class('card')
+
+        _replace_widget(list_box, self)
+
+    def _activate(self, list_view, position):
+        self.activated(self.model.get_item(position))
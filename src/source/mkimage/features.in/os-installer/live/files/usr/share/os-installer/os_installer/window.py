@@ -1,20 +1,38 @@
 # SPDX-License-Identifier: GPL-3.0-or-later
 
+from collections import OrderedDict
 from threading import Lock
+from os import sysconf
 from os.path import exists
+from time import perf_counter
 
-from gi.repository import Gio, Gtk, Adw
+from gi.repository import Gio, GLib, Gtk, Adw
 
 from .config import config
+from .keyboard_layout_provider import keyboard_layout_provider
 from .language_provider import language_provider
-from .page_wrapper import PageWrapper
+from .page_wrapper import PageWrapper, input_pages, prebuildable_pages
+from .retranslation import Retranslator
 from .state_machine import page_order, state_machine
 from .system_calls import set_system_language
+from .widgets import count_widgets
 
 
 forward = 1
 backwards = -1
 
+# number of upcoming pages built during idle time
+prebuild_ahead = 2
+# number of built pages kept in navigation view, least recently shown go first
+page_pool_size = 8
+
+
+def _get_resident_memory():
+    # in KiB, second field of statm is the resident set in pages
+    with open('/proc/self/statm') as file:
+        resident_pages = int(file.read().split()[1])
+    return resident_pages * sysconf('SC_PAGE_SIZE') // 1024
+
 
 @Gtk.Template(resource_path='/com/github/p3732/os-installer/ui/main_window.ui')
 class OsInstallerWindow(Adw.ApplicationWindow):
@@ -28,6 +46,17 @@ class OsInstallerWindow(Adw.ApplicationWindow):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        # pages built ahead of time, not yet added to navigation view
+        self.prebuilt_pages = {}
+        self.prebuild_source = None
+        # (page name, seconds to build, whether built ahead of time)
+        self.page_build_times = []
+        # permanent pages in navigation view, least recently shown first
+        self.page_pool = OrderedDict()
+        # names of visited pages that were evicted, rebuilt when navigated to
+        self.evicted_pages = set()
+        self.pages_language = config.get('language')[0]
+
         self._setup_actions()
         self.connect("close-request", self._show_confirm_dialog, None)
 
@@ -38,6 +67,7 @@ class OsInstallerWindow(Adw.ApplicationWindow):
         self.navigation_view.connect('get-next-page', self._add_next_page)
 
         config.subscribe('displayed-page', self._change_page, delayed=True)
+        self._schedule_prebuild()
 
     def _add_next_page(self, _):
         current_page = self.navigation_view.get_visible_page()
@@ -56,9 +86,81 @@ class OsInstallerWindow(Adw.ApplicationWindow):
         self._update_page()
 
     def _initialize_first_page(self):
-        initial_page = PageWrapper(self.available_pages[0])
+        initial_page = self._build_page(self.available_pages[0], prebuilt=False)
         initial_page.permanent = True
-        self.navigation_view.add(initial_page)
+        self._add_to_pool(initial_page)
+
+    def _build_page(self, page_name, prebuilt):
+        start = perf_counter()
+        page = PageWrapper(page_name)
+        duration = perf_counter() - start
+        self.page_build_times.append((page_name, duration, prebuilt))
+        if config.get('test_mode'):
+            when = 'ahead of time' if prebuilt else 'on demand'
+            print(f'Built page {page_name} {when} in {duration * 1000:.1f}ms')
+        return page
+
+    def _add_to_pool(self, page):
+        self.navigation_view.add(page)
+        self.page_pool[page.get_tag()] = page
+        self.evicted_pages.discard(page.get_tag())
+
+    def _evict_pages(self):
+        # pages in navigation stack are needed for going back
+        kept = {page.get_tag() for page in self.navigation_view.get_navigation_stack()}
+        kept |= input_pages
+        # for swiping forward
+        if next_page := self._add_next_page(None):
+            kept.add(next_page.get_tag())
+        for page_name, page in list(self.page_pool.items()):
+            if len(self.page_pool) <= page_pool_size:
+                break
+            if not page_name in kept:
+                self.navigation_view.remove(page)
+                del self.page_pool[page_name]
+                self.evicted_pages.add(page_name)
+
+    def _retranslate_pages(self):
+        language_code = config.get('language')[0]
+        if language_code == self.pages_language:
+            return
+
+        keyboard_layout_provider.retranslate()
+        retranslator = Retranslator(self.pages_language)
+        for page in self.page_pool.values():
+            page.retranslate(retranslator)
+        for page in self.prebuilt_pages.values():
+            page.retranslate(retranslator)
+        self.pages_language = language_code
+
+    def _get_pages_to_prebuild(self):
+        current_page = self.navigation_view.get_visible_page()
+        page_name = current_page.get_tag()
+        # pages built now would need to be rebuilt after leaving
+        if not current_page.permanent or state_machine.retranslates(page_name):
+            return []
+        index = self.available_pages.index(page_name)
+        upcoming = self.available_pages[index + 1:index + 1 + prebuild_ahead]
+        return [name for name in upcoming if name in prebuildable_pages and
+                not name in self.prebuilt_pages and
+                self.navigation_view.find_page(name) is None]
+
+    def _schedule_prebuild(self):
+        if self.prebuild_source is None:
+            self.prebuild_source = GLib.idle_add(
+                self._prebuild_page, priority=GLib.PRIORITY_LOW)
+
+    def _prebuild_page(self):
+        with self.navigation_lock:
+            # one page per idle call, to not delay drawing
+            if pages_to_prebuild := self._get_pages_to_prebuild():
+                page_name = pages_to_prebuild[0]
+                self.prebuilt_pages[page_name] = self._build_page(
+                    page_name, prebuilt=True)
+                return GLib.SOURCE_CONTINUE
+
+            self.prebuild_source = None
+            return GLib.SOURCE_REMOVE
 
     def _add_action(self, action_name, callback, keybinding):
         action = Gio.SimpleAction.new(action_name, None)
@@ -132,6 +234,9 @@ class OsInstallerWindow(Adw.ApplicationWindow):
             if page := self.navigation_view.find_page(page_name):
                 self.navigation_view.remove(page)
                 del page
+            self.page_pool.pop(page_name, None)
+        self.evicted_pages.clear()
+        self.prebuilt_pages.clear()
 
         replacement = []
         if exception:
@@ -157,18 +262,21 @@ class OsInstallerWindow(Adw.ApplicationWindow):
                 case 'no_return':
                     self._remove_all_pages()
                 case 'retranslate':
-                    self._remove_all_pages('language')
+                    self._retranslate_pages()
 
             self._load_page(next_page_name)
 
     def _load_page(self, page_name: str, offset: int = forward, permanent: bool = True):
         page_to_load = self.navigation_view.find_page(page_name)
         if not page_to_load:
-            page_to_load = PageWrapper(page_name)
+            if permanent and page_name in self.prebuilt_pages:
+                page_to_load = self.prebuilt_pages.pop(page_name)
+            else:
+                page_to_load = self._build_page(page_name, prebuilt=False)
             page_to_load.permanent = permanent
 
             if permanent:
-                self.navigation_view.add(page_to_load)
+                self._add_to_pool(page_to_load)
                 if self.navigation_view.get_visible_page().get_tag() != page_name:
                     self.navigation_view.push_by_tag(page_name)
             else:
@@ -181,12 +289,28 @@ class OsInstallerWindow(Adw.ApplicationWindow):
                 self.navigation_view.pop_to_tag(page_name)
 
         self._update_page()
+        self._schedule_prebuild()
 
     def _update_page(self):
         current_page = self.navigation_view.get_visible_page()
+        if current_page.permanent and current_page.get_tag() in self.page_pool:
+            self.page_pool.move_to_end(current_page.get_tag())
+            self._evict_pages()
         is_first, is_last = self._current_is_first(), self._current_is_last()
         current_page.update_navigation_buttons(is_first, is_last)
 
+        if config.get('test_mode'):
+            # list rows only get created once laid out
+            GLib.idle_add(self._print_page_measurements, current_page,
+                          perf_counter(), priority=GLib.PRIORITY_LOW)
+
+    def _print_page_measurements(self, page, shown_at):
+        latency = (perf_counter() - shown_at) * 1000
+        memory = _get_resident_memory() / 1024
+        print(f'Page {page.get_tag()} laid out after {latency:.1f}ms, consists of '
+              f'{count_widgets(page)} widgets, resident memory {memory:.1f}MiB')
+        return GLib.SOURCE_REMOVE
+
     def _load_next_page(self, offset: int = forward):
         page_name = self._get_next_page_name(offset)
         self._load_page(page_name, offset)
@@ -202,6 +326,8 @@ class OsInstallerWindow(Adw.ApplicationWindow):
         if page_index + 1 == len(self.available_pages):
             return True
         next_page_name = self.available_pages[page_index + 1]
+        if next_page_name in self.evicted_pages:
+            return False
         return self.navigation_view.find_page(next_page_name) is None
 
     ### callbacks ###
@@ -209,6 +335,9 @@ class OsInstallerWindow(Adw.ApplicationWindow):
     def _change_page(self, value):
         with self.navigation_lock:
             match value := config.steal('displayed-page'):
+                case None:
+                    # already handled by an earlier notification
+                    return
                 case 'next', page:
                     self._advance(page)
                 case _:
@@ -0,0 +1,37 @@
+#!/usr/bin/env bash
+
+# Stand-in for the image registry when testing image prefetching offline.
+# Serves an image on localhost and prints the config to use it, e.g.
+#   local-registry.sh start [image]   (default: ghcr.io/alt-gnome/alt-atomic:latest)
+#   local-registry.sh stop
+
+NAME=os-installer-registry
+PORT=${PORT:-5000}
+SOURCE_IMAGE=${2:-ghcr.io/alt-gnome/alt-atomic:latest}
+TARGET_IMAGE="localhost:$PORT/$(basename "${SOURCE_IMAGE%%:*}"):${SOURCE_IMAGE##*:}"
+
+quit_on_err() { echo "ERROR: $1" >&2; exit 1; }
+
+case "$1" in
+    start)
+        sudo podman run -d --rm --name "$NAME" -p "$PORT:5000" docker.io/library/registry:2 \
+            || quit_on_err "Could not start registry"
+        # copies from local storage if present, from the original registry otherwise
+        if sudo podman image exists "$SOURCE_IMAGE"; then
+            SOURCE="containers-storage:$SOURCE_IMAGE"
+        else
+            SOURCE="docker://$SOURCE_IMAGE"
+        fi
+        sudo skopeo copy --dest-tls-verify=false "$SOURCE" "docker://$TARGET_IMAGE" \
+            || quit_on_err "Could not copy $SOURCE_IMAGE"
+        echo "Serving $TARGET_IMAGE, use in /etc/os-installer/config.yaml:"
+        echo "container_image: '$TARGET_IMAGE'"
+        ;;
+    stop)
+        sudo podman stop "$NAME"
+        ;;
+    *)
+        echo "Usage: $0 start [image] | stop"
+        exit 1
+        ;;
+esac
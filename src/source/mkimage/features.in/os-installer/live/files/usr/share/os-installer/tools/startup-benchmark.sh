@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+
+# Measures the time to first frame over several runs and checks it against a
+# budget in seconds, failing if the median exceeds it. Run on the live system:
+#   startup-benchmark.sh [budget] [runs]   (default: 1.5 seconds, 5 runs)
+# Each run writes its timeline to startup-<n>.json in the current directory.
+
+BUDGET=${1:-1.5}
+RUNS=${2:-5}
+
+quit_on_err() { echo "ERROR: $1" >&2; exit 1; }
+
+times=()
+for run in $(seq 1 "$RUNS"); do
+    # the budget makes the installer quit after the first frame, demo mode
+    # neither runs scripts nor prints page measurements
+    output=$(os-installer --demo-mode --startup-budget "$BUDGET" \
+                          --profile-startup "startup-$run.json" 2>&1)
+    time=$(sed -n 's/^Time to first frame: \([0-9.]*\)s$/\1/p' <<< "$output")
+    [[ -n "$time" ]] || quit_on_err "Run $run did not draw a frame:"$'\n'"$output"
+    echo "Run $run: ${time}s"
+    times+=("$time")
+done
+
+median=$(printf '%s\n' "${times[@]}" | sort -n | awk '{ t[NR] = $1 } END {
+    print (NR % 2) ? t[(NR + 1) / 2] : (t[NR / 2] + t[NR / 2 + 1]) / 2 }')
+echo "Median time to first frame: ${median}s, budget: ${BUDGET}s"
+awk -v median="$median" -v budget="$BUDGET" 'BEGIN { exit !(median <= budget) }' \
+    || quit_on_err "Median time to first frame exceeds budget"
@@ -0,0 +1,55 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+Times subscribe/set/unsubscribe cycles of short-lived subscribers while many
+long-lived ones are subscribed, as with pages and their rows. To compare
+against another version, pass the directory containing its os_installer:
+  python3 config_benchmark.py [pkgdatadir]
+'''
+
+from time import perf_counter
+import sys
+
+from helpers import use_pkgdatadir
+
+LONG_LIVED = 500
+CYCLES = 5000
+VARIABLES = ['benchmark_a', 'benchmark_b', 'benchmark_c']
+
+
+class Subscriber:
+    def __init__(self):
+        self.value = None
+
+    def on_change(self, value):
+        self.value = value
+
+
+def run_cycles(config, cycles):
+    start = perf_counter()
+    for cycle in range(cycles):
+        subscriber = Subscriber()
+        for variable in VARIABLES:
+            config.subscribe(variable, subscriber.on_change, delayed=True)
+        config.set(VARIABLES[cycle % len(VARIABLES)], cycle)
+        config.unsubscribe(subscriber)
+    return perf_counter() - start
+
+
+def main():
+    use_pkgdatadir(*sys.argv[1:2])
+    from os_installer.config import config
+
+    long_lived = [Subscriber() for _ in range(LONG_LIVED)]
+    for subscriber in long_lived:
+        for variable in VARIABLES:
+            config.subscribe(variable, subscriber.on_change, delayed=True)
+
+    run_cycles(config, CYCLES // 10)
+    duration = run_cycles(config, CYCLES)
+    print(f'{CYCLES} cycles with {LONG_LIVED} long-lived subscribers: '
+          f'{duration * 1000:.1f}ms, {duration / CYCLES * 1e6:.1f}µs per cycle')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+'''
+Makes the installer package importable from the source tree. Tests need
+PyGObject with GLib, widgets are not created. Run them from this directory:
+  python3 -m unittest
+'''
+
+import os
+import sys
+
+pkgdatadir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          '..', 'live', 'files', 'usr', 'share', 'os-installer')
+
+
+def use_pkgdatadir(path=pkgdatadir):
+    sys.path.insert(0, path)
+    import gi
+    gi.require_version('GLib', '2.0')
+    gi.require_version('Gio', '2.0')
@@ -0,0 +1,58 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import gc
+import unittest
+
+from helpers import use_pkgdatadir
+
+try:
+    use_pkgdatadir()
+    from os_installer.config import config
+except ImportError as e:
+    raise unittest.SkipTest(f'Needs PyGObject and PyYAML: {e}')
+
+from config_benchmark import Subscriber, run_cycles  # noqa: E402
+
+
+class ConfigSubscriptionTest(unittest.TestCase):
+    def test_set_notifies_subscribers(self):
+        subscriber = Subscriber()
+        config.subscribe('test_notified', subscriber.on_change, delayed=True)
+        config.set('test_notified', 1)
+        self.assertEqual(subscriber.value, 1)
+        config.unsubscribe(subscriber)
+
+    def test_unsubscribe_removes_subscriptions(self):
+        subscriber = Subscriber()
+        config.subscribe('test_unsubscribed', subscriber.on_change, delayed=True)
+        config.unsubscribe(subscriber)
+        config.set('test_unsubscribed', 1)
+        self.assertIsNone(subscriber.value)
+        self.assertEqual(config.subscriptions['test_unsubscribed'], {})
+        self.assertNotIn(id(subscriber), config.owned_subscriptions)
+
+    def test_dead_subscribers_are_pruned(self):
+        subscriber = Subscriber()
+        owner_id = id(subscriber)
+        config.subscribe('test_pruned', subscriber.on_change, delayed=True)
+        del subscriber
+        gc.collect()
+
+        # skipped, but only removed with the next change of subscriptions
+        config.set('test_pruned', 1)
+        self.assertEqual(len(config.dead_subscriptions), 1)
+        config.subscribe('test_pruning', lambda value: None, delayed=True)
+
+        self.assertEqual(config.dead_subscriptions, [])
+        self.assertEqual(config.subscriptions['test_pruned'], {})
+        self.assertNotIn(owner_id, config.owned_subscriptions)
+
+    def test_cycles_leave_no_subscriptions(self):
+        run_cycles(config, 1000)
+        for variable in ['benchmark_a', 'benchmark_b', 'benchmark_c']:
+            self.assertEqual(config.subscriptions[variable], {})
+        self.assertEqual(config.dead_subscriptions, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# SPDX-License-Identifier: GPL-3.0-or-later
+
+import unittest
+
+from helpers import use_pkgdatadir
+
+try:
+    use_pkgdatadir()
+    from os_installer.config import config
+    from os_installer.disk_provider import DiskProvider
+    from os_installer.udisks_stand_in import StandInClient
+except ImportError as e:
+    raise unittest.SkipTest(f'Needs PyGObject and PyYAML: {e}')
+
+
+class DisksRecorder:
+    def __init__(self):
+        self.updates = []
+
+    def on_disks(self, disks):
+        self.updates.append([disk.device_path for disk in disks])
+
+
+class DiskInventoryTest(unittest.TestCase):
+    def setUp(self):
+        self.client = StandInClient()
+        self.provider = DiskProvider()
+        self.provider.udisks_client = self.client
+        self.provider._update_inventory()
+        self.client.connect('changed', self.provider._udisks_changed)
+
+        self.recorder = DisksRecorder()
+        config.subscribe('disks', self.recorder.on_disks, delayed=True)
+
+    def tearDown(self):
+        config.unsubscribe(self.recorder)
+
+    def test_added_disk_is_reported(self):
+        self.client.add_disk('Disk', 100000000000, '/dev/sda', [
+            ('EFI', 200000000, '/dev/sda1', True)])
+        self.assertEqual(self.recorder.updates, [['/dev/sda']])
+        self.assertTrue(self.provider.block_devices >= {'/dev/sda', '/dev/sda1'})
+
+    def test_removed_disk_is_reported(self):
+        self.client.add_disk('Disk', 100000000000, '/dev/sda')
+        self.client.add_disk('Other disk', 100000000000, '/dev/sdb')
+        self.client.remove_disk('/dev/sda')
+        self.assertEqual(self.recorder.updates[-1], ['/dev/sdb'])
+        self.assertNotIn('/dev/sda', self.provider.block_devices)
+
+    def test_unchanged_signature_is_not_reported(self):
+        self.client.add_disk('Disk', 100000000000, '/dev/sda')
+        self.recorder.updates.clear()
+
+        # e.g. a changed mount state
+        self.client._emit('changed')
+        self.assertEqual(self.recorder.updates, [])
+
+    def test_optical_drive_is_ignored(self):
+        self.client.add_disk('Disc', 700000000, '/dev/sr0', optical=True)
+        # the disk list stays empty, so config does not notify
+        self.assertEqual(self.recorder.updates, [])
+        self.assertEqual(self.provider.disks, [])
+
+
+if __name__ == '__main__':
+    unittest.main()